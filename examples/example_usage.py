@@ -2,6 +2,8 @@
 Example usage of PDF to Markdown converter
 """
 
+from functools import partial
+from multiprocessing import get_context
 from pathlib import Path
 from pdf_to_markdown import PDFToMarkdownConverter, ConversionConfig
 
@@ -62,6 +64,16 @@ def custom_configuration():
     return result
 
 
+def _convert_wrapper(pdf_path, output_base_dir, config):
+    """Convert one PDF in a worker process (must be module-level to pickle)"""
+    try:
+        converter = PDFToMarkdownConverter(config)
+        output_path = converter.convert(pdf_path, output_base_dir / pdf_path.stem)
+        return pdf_path, output_path, None
+    except Exception as e:
+        return pdf_path, None, str(e)
+
+
 def batch_conversion():
     """Convert multiple PDFs in batch"""
     
@@ -72,9 +84,6 @@ def batch_conversion():
         verbose=True
     )
     
-    # Create converter
-    converter = PDFToMarkdownConverter(config)
-    
     # List of PDFs to convert
     pdf_files = [
         Path("doc1.pdf"),
@@ -82,18 +91,18 @@ def batch_conversion():
         Path("doc3.pdf")
     ]
     
-    # Batch convert
-    results = converter.batch_convert(
-        pdf_files=pdf_files,
-        output_base_dir=Path("batch_output")
-    )
-    
-    # Process results
-    for pdf_path, output_path, error in results:
-        if output_path:
-            print(f"✓ {pdf_path.name} -> {output_path}")
-        else:
-            print(f"✗ {pdf_path.name}: {error}")
+    convert = partial(_convert_wrapper, output_base_dir=Path("batch_output"), config=config)
+    
+    # Use 'spawn' since forking after PyMuPDF has loaded is unsafe.
+    # imap_unordered with chunksize=1 hands out one document at a time,
+    # so a long PDF never holds short ones up behind it.
+    ctx = get_context('spawn')
+    with ctx.Pool(config.num_workers) as pool:
+        for pdf_path, output_path, error in pool.imap_unordered(convert, pdf_files, chunksize=1):
+            if output_path:
+                print(f"✓ {pdf_path.name} -> {output_path}")
+            else:
+                print(f"✗ {pdf_path.name}: {error}")
 
 
 def selective_extraction():
@@ -215,34 +224,13 @@ def extract_specific_pages():
     
     from pdf_to_markdown.extractors import TextExtractor, ImageExtractor
     
-    # Note: This requires custom implementation
-    # Example of how you might extend the extractor
-    
-    class CustomTextExtractor(TextExtractor):
-        def __init__(self, pages_to_extract=None, **kwargs):
-            super().__init__(**kwargs)
-            self.pages_to_extract = pages_to_extract or []
-        
-        def extract(self, pdf_path):
-            all_blocks = super().extract(pdf_path)
-            
-            if self.pages_to_extract:
-                # Filter blocks by page number
-                filtered = [
-                    block for block in all_blocks 
-                    if block.page_num in self.pages_to_extract
-                ]
-                return filtered
-            
-            return all_blocks
-    
-    # Use custom extractor
     config = ConversionConfig()
     converter = PDFToMarkdownConverter(config)
     
-    # Replace the default extractor
-    converter.text_extractor = CustomTextExtractor(
-        pages_to_extract=[1, 2, 5, 10],  # Extract only these pages
+    # Replace the default extractor with one limited to a few pages; the
+    # other pages are skipped before PyMuPDF loads them
+    converter.text_extractor = TextExtractor(
+        pages=[1, 2, 5, 10],  # Extract only these pages
         use_ocr=False
     )
     
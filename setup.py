@@ -30,17 +30,9 @@ setup(
     install_requires=[
         "pymupdf>=1.23.0",
         "pdfplumber>=0.10.0",
-        "pypdf>=4.0.0",
-        "pytesseract>=0.3.10",
-        "pdf2image>=1.16.0",
         "pillow>=10.0.0",
-        "spacy>=3.7.0",
-        "nltk>=3.8.0",
-        "markdown2>=2.4.0",
-        "tabula-py>=2.8.0",
         "pandas>=2.1.0",
-        "camelot-py>=0.11.0",
-        "opencv-python>=4.8.0",
+        "numpy>=1.24.0",
         "click>=8.1.0",
         "rich>=13.7.0",
         "pyyaml>=6.0.0",
@@ -48,6 +40,24 @@ setup(
         "tqdm>=4.66.0",
         "pygments>=2.17.0",
     ],
+    extras_require={
+        "ocr": ["pytesseract>=0.3.10"],
+        "inline-images": ["opencv-python>=4.8.0"],
+        "tables-tabula": ["tabula-py>=2.8.0"],
+        "tables-camelot": ["camelot-py>=0.11.0", "opencv-python>=4.8.0"],
+        "nlp": ["spacy>=3.7.0", "nltk>=3.8.0"],
+        "fast-regex": ["hyperscan>=0.4.0"],
+        "jit": ["numba>=0.58"],
+        "fast-hash": ["xxhash>=3.4"],
+        "all": [
+            "pytesseract>=0.3.10",
+            "opencv-python>=4.8.0",
+            "tabula-py>=2.8.0",
+            "camelot-py>=0.11.0",
+            "spacy>=3.7.0",
+            "nltk>=3.8.0",
+        ],
+    },
     entry_points={
         "console_scripts": [
             "pdf2md=pdf_to_markdown.cli:main",
@@ -4,7 +4,14 @@ PDF to Markdown Enterprise - Comprehensive PDF to Markdown conversion with intel
 
 __version__ = "1.0.0"
 
-from .converter import PDFToMarkdownConverter
 from .config import ConversionConfig
 
-__all__ = ["PDFToMarkdownConverter", "ConversionConfig"]
\ No newline at end of file
+__all__ = ["PDFToMarkdownConverter", "ConversionConfig"]
+
+
+def __getattr__(name):
+    # The converter pulls in every PDF library, so load it on first use
+    if name == "PDFToMarkdownConverter":
+        from .converter import PDFToMarkdownConverter
+        return PDFToMarkdownConverter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,19 +1,47 @@
 import click
 import logging
 from pathlib import Path
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
-from rich.table import Table
-from rich.panel import Panel
-from rich import print as rprint
+from typing import Optional
+import itertools
+import mmap
+import os
 import sys
 
-from .converter import PDFToMarkdownConverter
 from .config import ConversionConfig, create_example_config_file
 
-console = Console()
 logger = logging.getLogger(__name__)
 
+# Rich is imported on first use so `--help` and argument errors stay fast
+_console = None
+
+
+def _get_console():
+    """Return the shared Rich console, creating it on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def __getattr__(name):
+    # Keep `cli.console` available to external callers
+    if name == 'console':
+        return _get_console()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# (label, ConversionConfig attribute) pairs shown by --verbose
+_CONFIG_DISPLAY_FIELDS = (
+    ("Extract Images", "extract_images"),
+    ("Extract Tables", "extract_tables"),
+    ("Extract Code", "extract_code"),
+    ("Use OCR", "use_ocr"),
+    ("Create Folders", "create_folder_structure"),
+    ("Table Method", "table_extraction_method"),
+    ("Heading Style", "heading_style"),
+)
+
 
 @click.group()
 @click.version_option(version='1.0.0', prog_name='pdf2md')
@@ -42,14 +70,20 @@ def cli():
               help='Use OCR for scanned pages')
 @click.option('--create-folders/--no-folders', default=True,
               help='Create folder structure based on document hierarchy')
+@click.option('--stream', is_flag=True,
+              help='Write Markdown page by page to limit memory use')
 @click.option('--verbose', '-v', is_flag=True,
               help='Enable verbose output')
 @click.option('--debug', is_flag=True,
               help='Enable debug output')
 def convert(pdf_path: Path, output_dir: Path, config: Path, 
            images: bool, tables: bool, code: bool, ocr: bool,
-           create_folders: bool, verbose: bool, debug: bool):
+           create_folders: bool, stream: bool, verbose: bool, debug: bool):
     """Convert a single PDF file to Markdown"""
+    from rich.panel import Panel
+    from .converter import PDFToMarkdownConverter
+    
+    console = _get_console()
     
     # Display header
     console.print(Panel.fit(
@@ -58,35 +92,48 @@ def convert(pdf_path: Path, output_dir: Path, config: Path,
         border_style="blue"
     ))
     
-    # Load or create configuration
-    if config:
-        console.print(f"Loading configuration from: [cyan]{config}[/cyan]")
-        if config.suffix in ['.yaml', '.yml']:
-            conversion_config = ConversionConfig.from_yaml(config)
-        else:
-            conversion_config = ConversionConfig.from_json(config)
-    else:
-        conversion_config = ConversionConfig(
-            extract_images=images,
-            extract_tables=tables,
-            extract_code=code,
-            use_ocr=ocr,
-            create_folder_structure=create_folders,
-            verbose=verbose,
-            debug=debug
-        )
-    
-    # Display configuration
-    if verbose:
-        _display_config(conversion_config)
-    
     try:
+        # Load or create configuration
+        if config:
+            console.print(f"Loading configuration from: [cyan]{config}[/cyan]")
+            if config.suffix in ['.yaml', '.yml']:
+                conversion_config = ConversionConfig.from_yaml(config)
+            else:
+                conversion_config = ConversionConfig.from_json(config)
+        else:
+            conversion_config = ConversionConfig(
+                extract_images=images,
+                extract_tables=tables,
+                extract_code=code,
+                use_ocr=ocr,
+                create_folder_structure=create_folders,
+                streaming=stream,
+                verbose=verbose,
+                debug=debug
+            )
+        
+        # Display configuration
+        if verbose:
+            _display_config(conversion_config)
+        
         # Create converter
         converter = PDFToMarkdownConverter(conversion_config)
         
-        # Perform conversion
-        with console.status("[bold green]Converting PDF...") as status:
-            result_path = converter.convert(pdf_path, output_dir)
+        # Perform conversion on a read-only memory map of the PDF so pages
+        # are loaded lazily by the OS instead of being copied into memory
+        with _convert_progress() as progress, open(pdf_path, 'rb') as pdf_file:
+            task = progress.add_task("Converting PDF", total=None)
+            update = lambda done, total: progress.update(task, completed=done, total=total)
+            
+            if os.fstat(pdf_file.fileno()).st_size == 0:
+                # An empty file can't be mapped; let the converter report it
+                result_path = converter.convert(pdf_path, output_dir, progress_callback=update)
+            else:
+                with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_data:
+                    result_path = converter.convert_stream(
+                        pdf_data, output_dir, source_name=pdf_path.name, progress_callback=update,
+                        source_path=pdf_path
+                    )
         
         # Success message
         console.print(Panel.fit(
@@ -118,45 +165,60 @@ def convert(pdf_path: Path, output_dir: Path, config: Path,
               help='Process files in parallel')
 @click.option('--workers', '-w', type=int, default=4,
               help='Number of parallel workers')
+@click.option('--backend', type=click.Choice(['process', 'thread', 'async']), default='process',
+              help='Parallel backend (default: process)')
 @click.option('--verbose', '-v', is_flag=True,
               help='Enable verbose output')
 def batch(input_dir: Path, output_dir: Path, config: Path, 
-         pattern: str, parallel: bool, workers: int, verbose: bool):
+         pattern: str, parallel: bool, workers: int, backend: str, verbose: bool):
     """Convert multiple PDF files in batch"""
+    from rich.panel import Panel
+    
+    console = _get_console()
     
-    # Find PDF files
-    pdf_files = list(input_dir.glob(pattern))
+    # Find PDF files lazily so conversion starts while the directory is scanned
+    pdf_iter = input_dir.glob(pattern)
+    first_pdf = next(pdf_iter, None)
     
-    if not pdf_files:
+    if first_pdf is None:
         console.print(f"[yellow]No PDF files found matching pattern: {pattern}[/yellow]")
         return
     
+    # Counting needs the whole walk before converting, so only do it when
+    # verbose; a known list also lets process workers take files in chunks
+    if verbose:
+        pdf_files = [first_pdf, *pdf_iter]
+        total = len(pdf_files)
+    else:
+        pdf_files = itertools.chain([first_pdf], pdf_iter)
+        total = None
+    
     # Display header
+    found = f"Found [green]{total}[/green] PDF files" if total is not None else \
+        f"Scanning [green]{input_dir}[/green] for [green]{pattern}[/green]"
     console.print(Panel.fit(
         "[bold blue]Batch PDF to Markdown Conversion[/bold blue]\n"
-        f"Found [green]{len(pdf_files)}[/green] PDF files",
+        f"{found}",
         border_style="blue"
     ))
     
-    # Load configuration
-    if config:
-        if config.suffix in ['.yaml', '.yml']:
-            conversion_config = ConversionConfig.from_yaml(config)
-        else:
-            conversion_config = ConversionConfig.from_json(config)
-    else:
-        conversion_config = ConversionConfig(
-            parallel_processing=parallel,
-            num_workers=workers,
-            verbose=verbose
-        )
-    
     try:
-        # Create converter
-        converter = PDFToMarkdownConverter(conversion_config)
+        # Load configuration (validated on construction, before any worker starts)
+        if config:
+            if config.suffix in ['.yaml', '.yml']:
+                conversion_config = ConversionConfig.from_yaml(config)
+            else:
+                conversion_config = ConversionConfig.from_json(config)
+        else:
+            conversion_config = ConversionConfig(
+                parallel_processing=parallel,
+                num_workers=workers,
+                parallel_backend=backend,
+                verbose=verbose
+            )
         
         # Perform batch conversion
-        results = converter.batch_convert(pdf_files, output_dir)
+        results = _batch_convert(pdf_files, output_dir, conversion_config, total)
         
         # Display results
         _display_batch_results(results)
@@ -170,12 +232,60 @@ def batch(input_dir: Path, output_dir: Path, config: Path,
         sys.exit(1)
 
 
+def _convert_progress():
+    """Create the progress display used by single-file conversion"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+    
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=_get_console()
+    )
+
+
+def _batch_progress():
+    """Create the progress display used by batch conversion"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+    
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        console=_get_console()
+    )
+
+
+def _batch_convert(pdf_files, output_dir: Path, config: ConversionConfig,
+                   total: Optional[int] = None):
+    """Convert PDFs with PDFToMarkdownConverter.batch_convert, showing its progress
+    
+    pdf_files may be a lazy iterator; batch_convert starts converting while
+    it is still being scanned.
+    """
+    from .converter import PDFToMarkdownConverter
+    
+    converter = PDFToMarkdownConverter(config)
+    
+    with _batch_progress() as progress:
+        task = progress.add_task("Converting PDFs", total=total)
+        return converter.batch_convert(
+            pdf_files, output_dir,
+            progress_callback=lambda done, _total: progress.update(task, completed=done)
+        )
+
+
 @cli.command()
 @click.argument('output_path', type=click.Path(path_type=Path))
 @click.option('--format', '-f', type=click.Choice(['yaml', 'json']), default='yaml',
               help='Configuration file format')
 def init_config(output_path: Path, format: str):
     """Create an example configuration file"""
+    from rich.panel import Panel
+    
+    console = _get_console()
     
     if format == 'json':
         output_path = output_path.with_suffix('.json')
@@ -200,8 +310,15 @@ def init_config(output_path: Path, format: str):
 
 @cli.command()
 @click.argument('pdf_path', type=click.Path(exists=True, path_type=Path))
-def analyze(pdf_path: Path):
+@click.option('--fast/--full', default=True,
+              help='Skip image, table, code and OCR extraction (default: fast)')
+def analyze(pdf_path: Path, fast: bool):
     """Analyze PDF structure without conversion"""
+    from rich.panel import Panel
+    from .converter import PDFToMarkdownConverter
+    from .extractors.pdf_source import open_fitz_document
+    
+    console = _get_console()
     
     console.print(Panel.fit(
         "[bold blue]PDF Structure Analysis[/bold blue]\n"
@@ -211,9 +328,23 @@ def analyze(pdf_path: Path):
     
     try:
         # Create minimal config for analysis
-        config = ConversionConfig(verbose=True)
+        if fast:
+            config = ConversionConfig.for_analysis()
+        else:
+            config = ConversionConfig(verbose=True, prefer_embedded_toc=False)
         converter = PDFToMarkdownConverter(config)
         
+        # An embedded outline gives the hierarchy without parsing any page
+        if config.prefer_embedded_toc:
+            with open_fitz_document(pdf_path) as doc:
+                outline = doc.get_toc(simple=True)
+                page_count = len(doc)
+                
+            if outline:
+                structure = converter.structure_analyzer.structure_from_outline(outline, page_count)
+                _display_analysis({'pages': page_count, 'outline_entries': len(outline)}, structure)
+                return
+        
         with console.status("[bold green]Analyzing PDF...") as status:
             # Extract content
             content = converter._extract_content(pdf_path)
@@ -231,23 +362,24 @@ def analyze(pdf_path: Path):
 
 def _display_config(config: ConversionConfig):
     """Display configuration settings"""
+    from rich.table import Table
+    
+    console = _get_console()
     table = Table(title="Configuration Settings", show_header=True)
     table.add_column("Setting", style="cyan")
     table.add_column("Value", style="green")
     
-    table.add_row("Extract Images", str(config.extract_images))
-    table.add_row("Extract Tables", str(config.extract_tables))
-    table.add_row("Extract Code", str(config.extract_code))
-    table.add_row("Use OCR", str(config.use_ocr))
-    table.add_row("Create Folders", str(config.create_folder_structure))
-    table.add_row("Table Method", config.table_extraction_method)
-    table.add_row("Heading Style", config.heading_style)
+    for label, attr in _CONFIG_DISPLAY_FIELDS:
+        table.add_row(label, str(getattr(config, attr)))
     
     console.print(table)
 
 
 def _display_batch_results(results):
     """Display batch conversion results"""
+    from rich.table import Table
+    
+    console = _get_console()
     table = Table(title="Batch Conversion Results", show_header=True)
     table.add_column("PDF File", style="cyan")
     table.add_column("Status", style="green")
@@ -267,16 +399,26 @@ def _display_batch_results(results):
 
 def _display_analysis(content, structure):
     """Display PDF analysis results"""
+    from rich.table import Table
+    
+    console = _get_console()
     
     # Content statistics
     stats_table = Table(title="Content Statistics", show_header=True)
     stats_table.add_column("Type", style="cyan")
     stats_table.add_column("Count", style="green")
     
-    stats_table.add_row("Text Blocks", str(len(content.get('text_blocks', []))))
-    stats_table.add_row("Images", str(len(content.get('images', []))))
-    stats_table.add_row("Tables", str(len(content.get('tables', []))))
-    stats_table.add_row("Code Blocks", str(len(content.get('code_blocks', []))))
+    if 'outline_entries' in content:
+        # Structure came from the embedded outline; pages were not parsed
+        stats_table.add_row("Pages", str(content['pages']))
+        stats_table.add_row("Outline Entries", str(content['outline_entries']))
+    else:
+        stats_table.add_row("Text Blocks", str(len(content.get('text_blocks', []))))
+        stats_table.add_row("Images", str(len(content.get('images', []))))
+        stats_table.add_row("Tables", str(len(content.get('tables', []))))
+        stats_table.add_row("Code Blocks", str(len(content.get('code_blocks', []))))
+        if content.get('scanned_pages'):
+            stats_table.add_row("Scanned Pages", str(len(content['scanned_pages'])))
     
     console.print(stats_table)
     
@@ -289,7 +431,7 @@ def _print_structure_tree(node, indent=0):
     """Print document structure as tree"""
     if hasattr(node, 'title'):
         prefix = "  " * indent + ("├─ " if indent > 0 else "")
-        console.print(f"{prefix}[cyan]{node.title}[/cyan]")
+        _get_console().print(f"{prefix}[cyan]{node.title}[/cyan]")
         
     for child in getattr(node, 'children', []):
         _print_structure_tree(child, indent + 1)
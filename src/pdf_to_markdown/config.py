@@ -1,14 +1,76 @@
-from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional
-from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, ClassVar
+from pathlib import Path, PurePath
+import copy
+import os
+import sys
 import yaml
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
-@dataclass
+# Prefer the libyaml-backed loader/dumper when available
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+class _ConfigDumper(_YamlDumper):
+    """Dumper for config files; writes paths as plain strings
+    
+    Representers are registered on this subclass so PyYAML's own dumpers
+    are left unchanged for other users in the process.
+    """
+
+
+_ConfigDumper.add_multi_representer(
+    PurePath, lambda dumper, path: dumper.represent_str(str(path))
+)
+
+
+# Allowed values for string options
+VALID_HEADING_STYLES = frozenset({'atx', 'setext'})
+VALID_TABLE_METHODS = frozenset({'auto', 'pdfplumber', 'tabula', 'camelot'})
+VALID_IMAGE_FORMATS = frozenset({'png', 'jpg', 'jpeg', 'webp'})
+VALID_PARALLEL_BACKENDS = frozenset({'process', 'thread', 'async'})
+VALID_IMAGE_HASHES = frozenset({'xxh3', 'md5', 'sha1'})
+
+# Page rendering is memory bound, so gains level off past a handful of workers
+MAX_AUTO_WORKERS = 8
+
+
+@lru_cache(maxsize=32)
+def _load_config_data(path: str, mtime_ns: int, fmt: str) -> Dict[str, Any]:
+    """Parse a config file once per (path, mtime)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if fmt == 'yaml':
+            return yaml.load(f, Loader=_YamlLoader) or {}
+        return json.load(f)
+
+
+def _read_config_file(path: Path, fmt: str) -> Dict[str, Any]:
+    """Return a private copy of the parsed config file contents"""
+    path = Path(path)
+    data = _load_config_data(str(path.resolve()), path.stat().st_mtime_ns, fmt)
+    # Deep copy so list/dict fields are never shared between instances
+    return copy.deepcopy(data)
+
+
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class ConversionConfig:
     """Configuration for PDF to Markdown conversion"""
     
+    # Raise ValueError from the constructor when the settings are invalid.
+    # Subclasses can turn this off and call validate() themselves.
+    _validate_on_init: ClassVar[bool] = True
+    
     # Extraction settings
     extract_images: bool = True
     extract_tables: bool = True
@@ -16,12 +78,23 @@ class ConversionConfig:
     use_ocr: bool = True
     ocr_language: str = 'eng'
     ocr_confidence_threshold: float = 0.5
+    # Tune ocr_confidence_threshold on the first OCR'd pages so that roughly
+    # ocr_target_kept of the recognised words pass it. Lower thresholds keep
+    # more (less certain) text.
+    ocr_adaptive_threshold: bool = False
+    ocr_target_kept: float = 0.9
+    ocr_batch_size: int = 8  # Pages rendered per OCR batch
+    ocr_bucket_by_dpi: bool = True  # Group same-sized page images within a batch
+    detect_scanned_pages_only: bool = False  # Mark text-less pages as scanned instead of parsing them
+    scanned_page_text_threshold: int = 50  # Minimum characters for a page to count as text
     
     # Image extraction settings
     min_image_width: int = 50
     min_image_height: int = 50
     extract_inline_images: bool = False
     detect_duplicate_images: bool = True
+    duplicate_image_hash: str = 'xxh3'  # xxh3 needs the xxhash package, otherwise sha1 is used
+    near_duplicate_image_distance: int = 0  # Max dHash bits apart to count as a duplicate (0 = exact only)
     image_output_format: str = 'png'  # png, jpg, webp
     image_quality: int = 95
     
@@ -34,11 +107,15 @@ class ConversionConfig:
     # Code extraction settings
     detect_code_blocks: bool = True
     min_code_lines: int = 2
+    code_punctuation_density: float = 0.0  # Share of {}[]();=<> below which text is prose (0 = off)
+    min_code_confidence: float = 0.0  # Drop detected code blocks scoring below this (0-1)
+    min_language_guess_chars: int = 0  # Shorter code skips Pygments language guessing (0 = off)
     highlight_code: bool = True
     export_code_files: bool = True
     
     # Structure analysis settings
     detect_toc: bool = True
+    prefer_embedded_toc: bool = True  # analyze reads the PDF outline instead of parsing pages when present
     max_hierarchy_depth: int = 4
     merge_single_child_sections: bool = True
     remove_empty_sections: bool = True
@@ -60,8 +137,16 @@ class ConversionConfig:
     
     # Processing settings
     parallel_processing: bool = True
-    num_workers: Optional[int] = None  # None = auto-detect
+    num_workers: Optional[int] = None  # None = auto-detect (resolved on construction)
+    # process: separate interpreters, best for CPU-bound parsing/rendering
+    # thread: shared interpreter; PyMuPDF is not thread-safe, so text, image
+    #         and OCR extraction take turns and only the rest overlaps
+    # async: runs like thread; batch conversion has one thread-pool implementation
+    parallel_backend: str = 'process'
+    intra_document_parallelism: bool = False  # Split one document's pages across num_workers processes
     batch_size: int = 10
+    prefetch_depth: int = 0  # Batch: PDFs read ahead on a background thread (0 = off)
+    streaming: bool = False  # Write Markdown page by page instead of building the full document
     verbose: bool = False
     debug: bool = False
     
@@ -69,41 +154,53 @@ class ConversionConfig:
     custom_heading_patterns: List[str] = field(default_factory=list)
     custom_code_patterns: Dict[str, List[str]] = field(default_factory=dict)
     
+    def __post_init__(self):
+        # Resolve the worker count once so every consumer sees the same value
+        if self.num_workers is None:
+            self.num_workers = min(os.cpu_count() or 1, MAX_AUTO_WORKERS)
+        
+        # Fail fast instead of deep inside a conversion or a batch worker
+        if self._validate_on_init:
+            errors = self.validate()
+            if errors:
+                raise ValueError(f"Configuration errors: {'; '.join(errors)}")
+    
+    @classmethod
+    def for_analysis(cls) -> 'ConversionConfig':
+        """Lightweight configuration for structure analysis only"""
+        return cls(
+            extract_images=False,
+            extract_tables=False,
+            extract_code=False,
+            use_ocr=False,
+            detect_scanned_pages_only=True,
+            verbose=True
+        )
+    
     @classmethod
     def from_yaml(cls, yaml_path: Path) -> 'ConversionConfig':
         """Load configuration from YAML file"""
-        with open(yaml_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        return cls(**data)
+        return cls(**_read_config_file(yaml_path, 'yaml'))
     
     @classmethod
     def from_json(cls, json_path: Path) -> 'ConversionConfig':
         """Load configuration from JSON file"""
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return cls(**data)
+        return cls(**_read_config_file(json_path, 'json'))
     
     def to_yaml(self, yaml_path: Path):
         """Save configuration to YAML file"""
-        data = self.__dict__.copy()
-        # Convert Path objects to strings
-        for key, value in data.items():
-            if isinstance(value, Path):
-                data[key] = str(value)
-        
         with open(yaml_path, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, default_flow_style=False)
+            yaml.dump(asdict(self), f, Dumper=_ConfigDumper, default_flow_style=False)
     
     def to_json(self, json_path: Path):
         """Save configuration to JSON file"""
-        data = self.__dict__.copy()
-        # Convert Path objects to strings
-        for key, value in data.items():
-            if isinstance(value, Path):
-                data[key] = str(value)
+        data = asdict(self)
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            Path(json_path).write_bytes(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, default=str)
     
     def validate(self) -> List[str]:
         """Validate configuration settings"""
@@ -118,21 +215,47 @@ class ConversionConfig:
             errors.append("image_quality must be between 1 and 100")
         if self.ocr_confidence_threshold < 0 or self.ocr_confidence_threshold > 1:
             errors.append("ocr_confidence_threshold must be between 0 and 1")
+        if not 0 < self.ocr_target_kept <= 1:
+            errors.append("ocr_target_kept must be greater than 0 and at most 1")
+        if self.ocr_batch_size < 1 or self.ocr_batch_size > 64:
+            errors.append("ocr_batch_size must be between 1 and 64")
+        if self.scanned_page_text_threshold < 0:
+            errors.append("scanned_page_text_threshold must be at least 0")
+        if self.num_workers < 1:
+            errors.append("num_workers must be at least 1")
+        
+        if not 0 <= self.code_punctuation_density <= 1:
+            errors.append("code_punctuation_density must be between 0 and 1")
+        
+        if not 0 <= self.min_code_confidence <= 1:
+            errors.append("min_code_confidence must be between 0 and 1")
+        
+        if self.min_language_guess_chars < 0:
+            errors.append("min_language_guess_chars must be at least 0")
+        
+        if self.prefetch_depth < 0:
+            errors.append("prefetch_depth must be at least 0")
         if self.max_hierarchy_depth < 1:
             errors.append("max_hierarchy_depth must be at least 1")
         
         # Validate string options
-        valid_heading_styles = ['atx', 'setext']
-        if self.heading_style not in valid_heading_styles:
-            errors.append(f"heading_style must be one of {valid_heading_styles}")
+        if self.heading_style not in VALID_HEADING_STYLES:
+            errors.append(f"heading_style must be one of {sorted(VALID_HEADING_STYLES)}")
+        
+        if self.table_extraction_method not in VALID_TABLE_METHODS:
+            errors.append(f"table_extraction_method must be one of {sorted(VALID_TABLE_METHODS)}")
+        
+        if self.image_output_format not in VALID_IMAGE_FORMATS:
+            errors.append(f"image_output_format must be one of {sorted(VALID_IMAGE_FORMATS)}")
+        
+        if self.parallel_backend not in VALID_PARALLEL_BACKENDS:
+            errors.append(f"parallel_backend must be one of {sorted(VALID_PARALLEL_BACKENDS)}")
         
-        valid_table_methods = ['auto', 'pdfplumber', 'tabula', 'camelot']
-        if self.table_extraction_method not in valid_table_methods:
-            errors.append(f"table_extraction_method must be one of {valid_table_methods}")
+        if self.duplicate_image_hash not in VALID_IMAGE_HASHES:
+            errors.append(f"duplicate_image_hash must be one of {sorted(VALID_IMAGE_HASHES)}")
         
-        valid_image_formats = ['png', 'jpg', 'jpeg', 'webp']
-        if self.image_output_format not in valid_image_formats:
-            errors.append(f"image_output_format must be one of {valid_image_formats}")
+        if not 0 <= self.near_duplicate_image_distance <= 64:
+            errors.append("near_duplicate_image_distance must be between 0 and 64")
         
         return errors
 
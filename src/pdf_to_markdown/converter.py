@@ -1,18 +1,50 @@
+import json
 import logging
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Callable, Tuple, Union, Sized
+import queue
 import shutil
+import sys
+import threading
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 from .config import ConversionConfig
-from .extractors import TextExtractor, ImageExtractor, TableExtractor, CodeBlockExtractor
+from .extractors.text_extractor import TextExtractor
+from .extractors.pdf_source import PDFSource, open_fitz_document, open_pdfplumber
 from .structure_analyzer import DocumentStructureAnalyzer
 from .markdown_generator import MarkdownGenerator
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Called as progress_callback(done, total) while a conversion runs
+ProgressCallback = Callable[[int, int], None]
+
+# Steps reported by the whole-document pipeline
+PIPELINE_STEPS = 6
+
+# PyMuPDF is not thread-safe; conversions on batch threads take turns with it
+_FITZ_LOCK = threading.Lock()
+
+
+@dataclass
+class PageResult:
+    """Markdown produced for a single page in streaming mode"""
+    page_num: int
+    markdown: str
+    path: Path
+
 
 class PDFToMarkdownConverter:
     """Main converter class for PDF to Markdown transformation"""
@@ -28,23 +60,48 @@ class PDFToMarkdownConverter:
         # Initialize extractors
         self.text_extractor = TextExtractor(
             use_ocr=self.config.use_ocr,
-            ocr_threshold=self.config.ocr_confidence_threshold
+            ocr_threshold=self.config.ocr_confidence_threshold,
+            skip_scanned_pages=self.config.detect_scanned_pages_only,
+            scanned_text_threshold=self.config.scanned_page_text_threshold,
+            ocr_batch_size=self.config.ocr_batch_size,
+            ocr_bucket_by_dpi=self.config.ocr_bucket_by_dpi,
+            ocr_adaptive_threshold=self.config.ocr_adaptive_threshold,
+            ocr_target_kept=self.config.ocr_target_kept,
+            page_workers=self.config.num_workers if self.config.intra_document_parallelism else 1
         )
         
-        self.image_extractor = ImageExtractor(
-            min_width=self.config.min_image_width,
-            min_height=self.config.min_image_height,
-            extract_inline=self.config.extract_inline_images,
-            detect_duplicates=self.config.detect_duplicate_images
-        ) if self.config.extract_images else None
-        
-        self.table_extractor = TableExtractor(
-            method=self.config.table_extraction_method,
-            min_rows=self.config.min_table_rows,
-            min_cols=self.config.min_table_cols
-        ) if self.config.extract_tables else None
-        
-        self.code_extractor = CodeBlockExtractor() if self.config.extract_code else None
+        # Optional extractors are imported only when enabled: tables need
+        # pandas, images numpy/Pillow and code detection Pygments
+        self.image_extractor = None
+        if self.config.extract_images:
+            from .extractors.image_extractor import ImageExtractor
+            self.image_extractor = ImageExtractor(
+                min_width=self.config.min_image_width,
+                min_height=self.config.min_image_height,
+                extract_inline=self.config.extract_inline_images,
+                detect_duplicates=self.config.detect_duplicate_images,
+                hash_algorithm=self.config.duplicate_image_hash,
+                near_duplicate_distance=self.config.near_duplicate_image_distance,
+                page_workers=self.config.num_workers if self.config.intra_document_parallelism else 1
+            )
+        
+        self.table_extractor = None
+        if self.config.extract_tables:
+            from .extractors.table_extractor import TableExtractor
+            self.table_extractor = TableExtractor(
+                method=self.config.table_extraction_method,
+                min_rows=self.config.min_table_rows,
+                min_cols=self.config.min_table_cols
+            )
+        
+        self.code_extractor = None
+        if self.config.extract_code:
+            from .extractors.code_extractor import CodeBlockExtractor
+            self.code_extractor = CodeBlockExtractor(
+                min_punctuation_density=self.config.code_punctuation_density,
+                min_confidence=self.config.min_code_confidence,
+                min_guess_chars=self.config.min_language_guess_chars
+            )
         
         # Initialize analyzers and generators
         self.structure_analyzer = DocumentStructureAnalyzer()
@@ -56,6 +113,10 @@ class PDFToMarkdownConverter:
             'image_format': self.config.image_link_style
         })
         
+        # Per-document progress bars; batch_convert turns them off in favour
+        # of its own bar, since concurrent bars serialize on terminal writes
+        self._show_document_progress = True
+        
         # Set logging level
         if self.config.debug:
             logging.getLogger().setLevel(logging.DEBUG)
@@ -64,13 +125,45 @@ class PDFToMarkdownConverter:
         else:
             logging.getLogger().setLevel(logging.WARNING)
     
-    def convert(self, pdf_path: Path, output_dir: Path) -> Path:
-        """Convert PDF to Markdown with folder structure"""
+    def convert(self, pdf_path: Path, output_dir: Path,
+                progress_callback: Optional[ProgressCallback] = None) -> Path:
+        """Convert PDF to Markdown with folder structure
+        
+        progress_callback(done, total) is called as work completes: once per
+        page in streaming mode, once per pipeline step otherwise.
+        """
         
         # Validate input
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
+        return self._convert_source(pdf_path, output_dir, pdf_path, progress_callback)
+    
+    def convert_stream(self, pdf_data: PDFSource, output_dir: Path,
+                       source_name: str = "document.pdf",
+                       progress_callback: Optional[ProgressCallback] = None,
+                       source_path: Optional[Path] = None) -> Path:
+        """Convert an in-memory PDF (bytes or mmap) to Markdown with folder structure
+        
+        source_path is the file the data was read from, if any; backends that
+        can only read files (camelot) use it instead of skipping the document.
+        """
+        return self._convert_source(pdf_data, output_dir, Path(source_name), progress_callback,
+                                    source_path)
+    
+    def _convert_source(self, pdf_source: PDFSource, output_dir: Path, pdf_path: Path,
+                        progress_callback: Optional[ProgressCallback] = None,
+                        source_path: Optional[Path] = None) -> Path:
+        """Run the conversion pipeline; pdf_path names the source document"""
+        
+        if self.config.streaming:
+            for _ in self.convert_streaming(pdf_source, output_dir, source_name=pdf_path.name,
+                                            progress_callback=progress_callback):
+                pass
+            return output_dir / f"{pdf_path.stem}.md"
+        
+        report = progress_callback or (lambda done, total: None)
+        
         # Create output directory
         output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -78,19 +171,23 @@ class PDFToMarkdownConverter:
         
         # Step 1: Extract content
         logger.info("Step 1: Extracting content from PDF...")
-        extracted_content = self._extract_content(pdf_path)
+        extracted_content = self._extract_content(pdf_source, source_path)
+        report(1, PIPELINE_STEPS)
         
         # Step 2: Analyze document structure
         logger.info("Step 2: Analyzing document structure...")
         document_structure = self._analyze_structure(extracted_content)
+        report(2, PIPELINE_STEPS)
         
         # Step 3: Create folder structure
         logger.info("Step 3: Creating folder structure...")
         folder_paths = self._create_folder_structure(document_structure, output_dir)
+        report(3, PIPELINE_STEPS)
         
         # Step 4: Export assets (images, tables, code)
         logger.info("Step 4: Exporting assets...")
         asset_paths = self._export_assets(extracted_content, output_dir)
+        report(4, PIPELINE_STEPS)
         
         # Step 5: Generate Markdown files
         logger.info("Step 5: Generating Markdown files...")
@@ -100,58 +197,149 @@ class PDFToMarkdownConverter:
             asset_paths,
             pdf_path.stem  # Pass the PDF filename without extension
         )
+        report(5, PIPELINE_STEPS)
         
         # Step 6: Create metadata file
         logger.info("Step 6: Creating metadata...")
         self._create_metadata(pdf_path, output_dir, extracted_content, document_structure)
+        report(6, PIPELINE_STEPS)
         
         logger.info(f"Conversion complete! Output saved to {output_dir}")
         
         return index_path
     
-    def _extract_content(self, pdf_path: Path) -> Dict[str, Any]:
-        """Extract all content from PDF"""
-        content = {}
+    def convert_streaming(self, pdf_path: PDFSource, output_dir: Path,
+                          source_name: Optional[str] = None,
+                          progress_callback: Optional[ProgressCallback] = None) -> Iterator[PageResult]:
+        """Convert a PDF page by page, yielding each page's Markdown as it is written
+        
+        Pages are written to output_dir/pages/NNNN.md and only one page's
+        content is held in memory at a time. The index and metadata are
+        built from the page files once all pages are done. Document
+        hierarchy detection and OCR are not applied in this mode.
+        """
+        source_path = Path(source_name) if source_name else Path(str(pdf_path))
+        pages_dir = output_dir / 'pages'
+        images_dir = output_dir / 'assets' / 'images'
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        
+        logger.info(f"Starting streaming conversion of {source_path}")
+        
+        stats = Counter()
+        page_files = []
+        seen_image_hashes = set()
+        image_xref_cache = {}
+        self.text_extractor.scanned_pages = []
+        
+        plumber_context = open_pdfplumber(pdf_path) if self.table_extractor else nullcontext()
+        with _open_fitz_locked(pdf_path) as doc, plumber_context as plumber:
+            with _FITZ_LOCK:
+                page_count = len(doc)
+            for page_num in range(1, page_count + 1):
+                # Hold the lock for this page's PyMuPDF work only, never across yield
+                with _FITZ_LOCK:
+                    page = doc[page_num - 1]
+                    text_blocks = self.text_extractor.extract_page(page, page_num)
+                    
+                    images = []
+                    if self.image_extractor:
+                        images = self.image_extractor.extract_page(
+                            page, page_num, seen_image_hashes, image_xref_cache
+                        )
+                    del page
+                    
+                tables = []
+                if self.table_extractor:
+                    plumber_page = plumber.pages[page_num - 1]
+                    tables = self.table_extractor.extract_page(plumber_page, page_num)
+                    plumber_page.close()  # Drop pdfplumber's cached page objects
+                    
+                code_blocks = self.code_extractor.extract(text_blocks) if self.code_extractor else []
+                
+                image_paths = self.image_extractor.save_images(images, images_dir) if images else {}
+                markdown = self.markdown_generator.generate_page(
+                    page_num, text_blocks, pages_dir, images, tables, code_blocks, image_paths
+                )
+                
+                page_path = pages_dir / f"{page_num:04d}.md"
+                page_path.write_text(markdown, encoding='utf-8')
+                page_files.append((page_num, page_path))
+                
+                stats['pages'] += 1
+                stats['text_blocks'] += len(text_blocks)
+                stats['images'] += len(images)
+                stats['tables'] += len(tables)
+                stats['code_blocks'] += len(code_blocks)
+                
+                if progress_callback:
+                    progress_callback(page_num, page_count)
+                    
+                yield PageResult(page_num=page_num, markdown=markdown, path=page_path)
+                
+        self.markdown_generator.generate_page_index(page_files, output_dir, source_path.stem, stats)
+        self._write_metadata(source_path, output_dir, dict(stats))
         
-        # Extract text
-        with tqdm(desc="Extracting text", unit="blocks") as pbar:
-            text_blocks = self.text_extractor.extract(pdf_path)
-            content['text_blocks'] = text_blocks
-            pbar.update(len(text_blocks))
-            logger.info(f"Extracted {len(text_blocks)} text blocks")
-        
-        # Extract images if enabled
-        if self.config.extract_images and self.image_extractor:
-            with tqdm(desc="Extracting images", unit="images") as pbar:
-                images = self.image_extractor.extract(pdf_path)
-                content['images'] = images
-                pbar.update(len(images))
-                logger.info(f"Extracted {len(images)} images")
-        else:
-            content['images'] = []
-        
-        # Extract tables if enabled
-        if self.config.extract_tables and self.table_extractor:
-            with tqdm(desc="Extracting tables", unit="tables") as pbar:
-                tables = self.table_extractor.extract(pdf_path)
-                content['tables'] = tables
-                pbar.update(len(tables))
-                logger.info(f"Extracted {len(tables)} tables")
-        else:
-            content['tables'] = []
-        
-        # Extract code blocks if enabled
-        if self.config.extract_code and self.code_extractor:
-            with tqdm(desc="Extracting code blocks", unit="blocks") as pbar:
-                code_blocks = self.code_extractor.extract(text_blocks)
-                content['code_blocks'] = code_blocks
-                pbar.update(len(code_blocks))
-                logger.info(f"Extracted {len(code_blocks)} code blocks")
-        else:
-            content['code_blocks'] = []
+        logger.info(f"Streaming conversion complete! Output saved to {output_dir}")
+    
+    def _extract_content(self, pdf_path: PDFSource, source_path: Optional[Path] = None) -> Dict[str, Any]:
+        """Extract all content from PDF
+        
+        Tables (pdfplumber/tabula/camelot) and code detection run on a
+        helper thread while text and images are extracted here; PyMuPDF is
+        not thread-safe, so everything that uses it stays on this thread and
+        holds _FITZ_LOCK against conversions on other threads.
+        """
+        content = {}
+        extract_tables = self.config.extract_tables and self.table_extractor
+        extract_code = self.config.extract_code and self.code_extractor
+        stages = 2 + bool(extract_tables) + bool(extract_code)
+        
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                tqdm(desc="Extracting content", total=stages, unit="stage",
+                     disable=not self._progress_enabled()) as pbar:
+            tables_future = executor.submit(self.table_extractor.extract, pdf_path, source_path) if extract_tables else None
+            
+            with _FITZ_LOCK:
+                # Extract text
+                text_blocks = self.text_extractor.extract(pdf_path)
+                content['text_blocks'] = text_blocks
+                content['scanned_pages'] = list(getattr(self.text_extractor, 'scanned_pages', []))
+                pbar.update()
+                logger.info(f"Extracted {len(text_blocks)} text blocks")
+                
+                # Code detection only needs the text, so it overlaps image extraction
+                code_future = executor.submit(self.code_extractor.extract, text_blocks) if extract_code else None
+                
+                # Extract images if enabled
+                if self.config.extract_images and self.image_extractor:
+                    content['images'] = self.image_extractor.extract(pdf_path)
+                    logger.info(f"Extracted {len(content['images'])} images")
+                else:
+                    content['images'] = []
+                pbar.update()
+            
+            # Extract tables if enabled
+            if tables_future:
+                content['tables'] = tables_future.result()
+                pbar.update()
+                logger.info(f"Extracted {len(content['tables'])} tables")
+            else:
+                content['tables'] = []
+            
+            # Extract code blocks if enabled
+            if code_future:
+                content['code_blocks'] = code_future.result()
+                pbar.update()
+                logger.info(f"Extracted {len(content['code_blocks'])} code blocks")
+            else:
+                content['code_blocks'] = []
         
         return content
     
+    def _progress_enabled(self) -> bool:
+        """Whether to draw per-document progress bars"""
+        return self._show_document_progress and sys.stderr.isatty()
+    
     def _analyze_structure(self, content: Dict[str, Any]) -> Any:
         """Analyze document structure"""
         return self.structure_analyzer.analyze(
@@ -175,33 +363,27 @@ class PDFToMarkdownConverter:
         # Export images
         if content.get('images') and self.image_extractor:
             images_dir = output_dir / 'assets' / 'images'
-            with tqdm(desc="Exporting images", total=len(content['images'])) as pbar:
-                image_paths = self.image_extractor.save_images(content['images'], images_dir)
-                asset_paths['images'] = image_paths
-                pbar.update(len(image_paths))
-                logger.info(f"Exported {len(image_paths)} images")
+            image_paths = self.image_extractor.save_images(content['images'], images_dir)
+            asset_paths['images'] = image_paths
+            logger.info(f"Exported {len(image_paths)} images")
         
         # Export tables
         if content.get('tables') and self.table_extractor:
             tables_dir = output_dir / 'assets' / 'tables'
-            with tqdm(desc="Exporting tables", total=len(content['tables'])) as pbar:
-                table_paths = self.table_extractor.export_tables(
-                    content['tables'], 
-                    tables_dir,
-                    self.config.export_table_formats
-                )
-                asset_paths['tables'] = table_paths
-                pbar.update(len(table_paths))
-                logger.info(f"Exported {len(table_paths)} tables")
+            table_paths = self.table_extractor.export_tables(
+                content['tables'], 
+                tables_dir,
+                self.config.export_table_formats
+            )
+            asset_paths['tables'] = table_paths
+            logger.info(f"Exported {len(table_paths)} tables")
         
         # Export code blocks
         if content.get('code_blocks') and self.code_extractor and self.config.export_code_files:
             code_dir = output_dir / 'assets' / 'code'
-            with tqdm(desc="Exporting code blocks", total=len(content['code_blocks'])) as pbar:
-                code_paths = self.code_extractor.export_code_blocks(content['code_blocks'], code_dir)
-                asset_paths['code'] = code_paths
-                pbar.update(len(code_paths))
-                logger.info(f"Exported {len(code_paths)} code blocks")
+            code_paths = self.code_extractor.export_code_blocks(content['code_blocks'], code_dir)
+            asset_paths['code'] = code_paths
+            logger.info(f"Exported {len(code_paths)} code blocks")
         
         return asset_paths
     
@@ -220,9 +402,16 @@ class PDFToMarkdownConverter:
     def _create_metadata(self, pdf_path: Path, output_dir: Path, 
                         content: Dict[str, Any], document_structure: Any):
         """Create metadata file with conversion information"""
-        import json
-        from datetime import datetime
-        
+        self._write_metadata(pdf_path, output_dir, {
+            'text_blocks': len(content.get('text_blocks', [])),
+            'images': len(content.get('images', [])),
+            'tables': len(content.get('tables', [])),
+            'code_blocks': len(content.get('code_blocks', [])),
+            'sections': self._count_sections(document_structure)
+        })
+    
+    def _write_metadata(self, pdf_path: Path, output_dir: Path, statistics: Dict[str, int]):
+        """Write metadata.json with conversion settings and statistics"""
         metadata = {
             'source_pdf': str(pdf_path.name),
             'conversion_date': datetime.now().isoformat(),
@@ -233,65 +422,228 @@ class PDFToMarkdownConverter:
                 'extract_code': self.config.extract_code,
                 'use_ocr': self.config.use_ocr,
             },
-            'statistics': {
-                'text_blocks': len(content.get('text_blocks', [])),
-                'images': len(content.get('images', [])),
-                'tables': len(content.get('tables', [])),
-                'code_blocks': len(content.get('code_blocks', [])),
-                'sections': self._count_sections(document_structure)
-            }
+            'statistics': statistics
         }
         
         metadata_file = output_dir / 'metadata.json'
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        if orjson is not None:
+            metadata_file.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+        else:
+            with open(metadata_file, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
         
         logger.info(f"Created metadata file: {metadata_file}")
     
     def _count_sections(self, node: Any) -> int:
         """Count total number of sections in document structure"""
+        # Walk with an explicit stack so deep hierarchies can't hit the recursion limit
         count = 0
-        if hasattr(node, 'node_type') and node.node_type != 'root':
-            count = 1
-        for child in getattr(node, 'children', []):
-            count += self._count_sections(child)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if getattr(node, 'node_type', 'root') != 'root':
+                count += 1
+            stack.extend(getattr(node, 'children', ()))
         return count
     
-    def batch_convert(self, pdf_files: List[Path], output_base_dir: Path):
-        """Convert multiple PDF files in batch"""
+    def batch_convert(self, pdf_files: Iterable[Path], output_base_dir: Path,
+                      progress_callback: Optional[ProgressCallback] = None):
+        """Convert multiple PDF files in batch
+        
+        pdf_files may be a lazy iterator (e.g. a directory glob); conversion
+        starts while it is still being read. progress_callback(done, total)
+        replaces the tqdm bar and is called as each file finishes, with total
+        None when pdf_files has no length.
+        """
         results = []
+        total = len(pdf_files) if isinstance(pdf_files, Sized) else None
+        
+        def record(pdf_path, result, error):
+            if error is not None:
+                logger.error(f"Failed to convert {pdf_path}: {error}")
+            results.append((pdf_path, result, error))
+            pbar.update()
+            if progress_callback:
+                progress_callback(len(results), total)
+        
+        # Optionally read upcoming PDFs on a background thread so disk or
+        # network latency overlaps with conversion
+        if self.config.prefetch_depth:
+            sources = _prefetch(pdf_files, self.config.prefetch_depth)
+        else:
+            sources = ((pdf_path, None) for pdf_path in pdf_files)
         
-        if self.config.parallel_processing:
-            # Parallel processing
-            num_workers = self.config.num_workers or 4
-            with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                futures = {}
-                for pdf_path in pdf_files:
-                    output_dir = output_base_dir / pdf_path.stem
-                    future = executor.submit(self.convert, pdf_path, output_dir)
-                    futures[future] = pdf_path
+        with self._batch_progress(), tqdm(total=total, desc="Converting PDFs",
+                                          disable=progress_callback is not None) as pbar:
+            if self.config.parallel_processing:
+                # Parallel processing
+                num_workers = min(self.config.num_workers, total) if total else self.config.num_workers
                 
-                for future in tqdm(as_completed(futures), total=len(futures), desc="Converting PDFs"):
-                    pdf_path = futures[future]
+                # When the whole list is known up front, process workers get it
+                # in chunks rather than one future per PDF, unless prefetching
+                if self.config.parallel_backend == 'process' and not self.config.prefetch_depth \
+                        and total is not None:
+                    self._batch_map(pdf_files, output_base_dir, num_workers, record)
+                else:
+                    self._batch_submit(sources, output_base_dir, num_workers, record)
+            else:
+                # Sequential processing
+                for pdf_path, data in sources:
                     try:
-                        result = future.result()
-                        results.append((pdf_path, result, None))
+                        result = self._convert_prefetched(pdf_path, data, output_base_dir / pdf_path.stem)
+                        record(pdf_path, result, None)
                     except Exception as e:
-                        logger.error(f"Failed to convert {pdf_path}: {e}")
-                        results.append((pdf_path, None, str(e)))
-        else:
-            # Sequential processing
-            for pdf_path in tqdm(pdf_files, desc="Converting PDFs"):
-                output_dir = output_base_dir / pdf_path.stem
-                try:
-                    result = self.convert(pdf_path, output_dir)
-                    results.append((pdf_path, result, None))
-                except Exception as e:
-                    logger.error(f"Failed to convert {pdf_path}: {e}")
-                    results.append((pdf_path, None, str(e)))
+                        record(pdf_path, None, str(e))
         
         # Summary
         successful = sum(1 for _, result, _ in results if result)
-        logger.info(f"Batch conversion complete: {successful}/{len(pdf_files)} successful")
+        logger.info(f"Batch conversion complete: {successful}/{len(results)} successful")
         
-        return results
\ No newline at end of file
+        return results
+    
+    def _batch_map(self, pdf_files: List[Path], output_base_dir: Path, num_workers: int,
+                   record: Callable[[Path, Optional[Path], Optional[str]], None]):
+        """Convert pdf_files in process workers, handing them out in chunks"""
+        chunksize = max(1, len(pdf_files) // (4 * num_workers))
+        output_dirs = [output_base_dir / pdf_path.stem for pdf_path in pdf_files]
+        
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                 initargs=(self.config,)) as executor:
+            outcomes = executor.map(_convert_entry, pdf_files, output_dirs,
+                                    repeat(self.config), chunksize=chunksize)
+            for pdf_path, (result, error) in zip(pdf_files, outcomes):
+                record(pdf_path, result, error)
+    
+    def _batch_submit(self, sources: Iterator[Tuple[Path, Union[bytes, OSError, None]]],
+                      output_base_dir: Path, num_workers: int,
+                      record: Callable[[Path, Optional[Path], Optional[str]], None]):
+        """Convert sources as individual jobs, recording each as it completes"""
+        # Conversion is CPU-bound Python, so processes by default. Threads
+        # each get their own converter, since extractors keep per-document
+        # state, and take turns on PyMuPDF via _FITZ_LOCK
+        if self.config.parallel_backend == 'process':
+            executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                           initargs=(self.config,))
+            
+            def submit(pdf_path, data, output_dir):
+                # Prefetched bytes go to the worker so it doesn't read the file again
+                return executor.submit(_convert_one, pdf_path, output_dir, self.config, data)
+        else:
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+            local = threading.local()
+            
+            def convert(pdf_path, data, output_dir):
+                if not hasattr(local, 'converter'):
+                    local.converter = PDFToMarkdownConverter(self.config)
+                    local.converter._show_document_progress = False
+                return local.converter._convert_prefetched(pdf_path, data, output_dir)
+            
+            def submit(pdf_path, data, output_dir):
+                return executor.submit(convert, pdf_path, data, output_dir)
+        
+        pending = {}
+        
+        def reap(futures):
+            for future in futures:
+                pdf_path = pending.pop(future)
+                try:
+                    record(pdf_path, future.result(), None)
+                except Exception as e:
+                    record(pdf_path, None, str(e))
+        
+        with executor:
+            # Keep a bounded number of jobs queued so prefetched data
+            # doesn't pile up behind busy workers
+            for pdf_path, data in sources:
+                if len(pending) >= 2 * num_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    reap(done)
+                pending[submit(pdf_path, data, output_base_dir / pdf_path.stem)] = pdf_path
+                
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                reap(done)
+    
+    @contextmanager
+    def _batch_progress(self):
+        """Hide per-document progress bars while the batch bar is shown"""
+        show_document_progress = self._show_document_progress
+        self._show_document_progress = False
+        try:
+            yield
+        finally:
+            self._show_document_progress = show_document_progress
+    
+    def _convert_prefetched(self, pdf_path: Path, data: Union[bytes, OSError, None],
+                            output_dir: Path) -> Path:
+        """Convert a batch entry from its prefetched bytes, or from disk when not prefetched"""
+        if data is None:
+            return self.convert(pdf_path, output_dir)
+        if isinstance(data, OSError):
+            raise data
+        return self.convert_stream(data, output_dir, source_name=pdf_path.name, source_path=pdf_path)
+
+
+@contextmanager
+def _open_fitz_locked(source: PDFSource):
+    """Open a PyMuPDF document, holding _FITZ_LOCK while it is opened and closed"""
+    stack = ExitStack()
+    with _FITZ_LOCK:
+        doc = stack.enter_context(open_fitz_document(source))
+    try:
+        yield doc
+    finally:
+        with _FITZ_LOCK:
+            stack.close()
+
+
+def _prefetch(pdf_files: List[Path], depth: int) -> Iterator[Tuple[Path, Union[bytes, OSError]]]:
+    """Yield (path, contents) pairs read by a background thread at most depth files ahead
+    
+    A read error is yielded in place of the contents so it is reported
+    against that file.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    
+    def read_ahead():
+        for pdf_path in pdf_files:
+            try:
+                buffer.put((pdf_path, pdf_path.read_bytes()))
+            except OSError as e:
+                buffer.put((pdf_path, e))
+        buffer.put(None)
+    
+    threading.Thread(target=read_ahead, name="pdf-prefetch", daemon=True).start()
+    
+    while True:
+        item = buffer.get()
+        if item is None:
+            return
+        yield item
+
+
+def _init_worker(config: ConversionConfig):
+    """Warm per-process caches before a worker's first conversion"""
+    if config.extract_code:
+        from .extractors.code_extractor import preload_lexers
+        preload_lexers()
+
+
+def _convert_entry(pdf_path: Path, output_dir: Path,
+                   config: ConversionConfig) -> Tuple[Optional[Path], Optional[str]]:
+    """Convert a single PDF, returning (result, error) instead of raising"""
+    try:
+        return _convert_one(pdf_path, output_dir, config), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _convert_one(pdf_path: Path, output_dir: Path, config: ConversionConfig,
+                 data: Union[bytes, OSError, None] = None) -> Path:
+    """Convert a single PDF with a fresh converter (module-level so workers can pickle it)
+    
+    data is the file's prefetched contents, or None to read it from pdf_path.
+    """
+    converter = PDFToMarkdownConverter(config)
+    converter._show_document_progress = False
+    return converter._convert_prefetched(pdf_path, data, output_dir)
@@ -2,11 +2,18 @@
 Content extraction modules for PDF processing
 """
 
-from .text_extractor import TextExtractor
-from .image_extractor import ImageExtractor
-from .table_extractor import TableExtractor
-from .code_extractor import CodeBlockExtractor
-from .content_merger import ContentMerger, ContentBlock
+import importlib
+
+# Extractors are imported on first access so that using one of them (or
+# just pdf_source) doesn't load pandas, OpenCV and Pygments for the others
+_EXPORTS = {
+    "TextExtractor": ".text_extractor",
+    "ImageExtractor": ".image_extractor",
+    "TableExtractor": ".table_extractor",
+    "CodeBlockExtractor": ".code_extractor",
+    "ContentMerger": ".content_merger",
+    "ContentBlock": ".content_merger",
+}
 
 __all__ = [
     "TextExtractor",
@@ -15,4 +22,17 @@ __all__ = [
     "CodeBlockExtractor",
     "ContentMerger",
     "ContentBlock"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        # Cache it so later lookups skip __getattr__
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,81 @@
+"""
+Numba-compiled line classification for code segment detection
+
+Importing this module requires numba; code_extractor loads it lazily and
+falls back to NumPy/Python when it is not installed.
+"""
+
+import numpy as np
+from numba import njit
+
+# Per-line results of code_line_flags
+PROSE_LINE = 0
+CODE_LINE = 1
+RECHECK_LINE = 2  # Contains non-ASCII bytes; classify with the Python rules
+
+
+@njit(cache=True, nogil=True)
+def _is_code_byte(c):
+    # {}()[];=
+    return (c == 0x7B or c == 0x7D or c == 0x28 or c == 0x29 or
+            c == 0x5B or c == 0x5D or c == 0x3B or c == 0x3D)
+
+
+@njit(cache=True, nogil=True)
+def _is_space_byte(c):
+    # ASCII characters str.strip() removes, other than the line separator
+    return c == 0x20 or c == 0x09 or c == 0x0D or c == 0x0B or c == 0x0C or (0x1C <= c <= 0x1F)
+
+
+@njit(cache=True, nogil=True)
+def code_line_flags(buf):
+    """Classify each '\\n'-separated line of a UTF-8 buffer like _is_code_line"""
+    n = buf.shape[0]
+    n_lines = 1
+    for j in range(n):
+        if buf[j] == 0x0A:
+            n_lines += 1
+
+    flags = np.zeros(n_lines, dtype=np.uint8)
+    line = 0
+    start = 0
+    for end in range(n + 1):
+        if end < n and buf[end] != 0x0A:
+            continue
+
+        is_code = False
+        is_ascii = True
+        is_blank = True
+        for j in range(start, end):
+            c = buf[j]
+            if c >= 0x80:
+                is_ascii = False
+            if _is_code_byte(c):
+                is_code = True
+            elif j + 1 < end:
+                d = buf[j + 1]
+                # ->, ::, //
+                if (c == 0x2D and d == 0x3E) or (c == 0x3A and d == 0x3A) or (c == 0x2F and d == 0x2F):
+                    is_code = True
+            if not _is_space_byte(c):
+                is_blank = False
+
+        length = end - start
+        if length > 0:
+            first = buf[start]
+            if first == 0x09:
+                is_code = True
+            elif length >= 4 and first == 0x20 and buf[start + 1] == 0x20 and \
+                    buf[start + 2] == 0x20 and buf[start + 3] == 0x20:
+                is_code = True
+            elif is_blank and first == 0x20:
+                is_code = True
+
+        if not is_ascii:
+            flags[line] = RECHECK_LINE
+        elif is_code:
+            flags[line] = CODE_LINE
+        line += 1
+        start = end + 1
+
+    return flags
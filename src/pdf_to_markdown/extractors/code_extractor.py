@@ -1,15 +1,72 @@
 import logging
+import os
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
 import re
+import sys
+import threading
+import numpy as np
 from dataclasses import dataclass
 from pathlib import Path
 from pygments.lexers import get_lexer_by_name, guess_lexer
 from pygments.util import ClassNotFound
 
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover - optional speedup
+    hyperscan = None
+
 logger = logging.getLogger(__name__)
 
+# File extension used when exporting each language
+CODE_FILE_EXTENSIONS = {
+    'python': '.py',
+    'javascript': '.js',
+    'java': '.java',
+    'c': '.c',
+    'cpp': '.cpp',
+    'csharp': '.cs',
+    'sql': '.sql',
+    'bash': '.sh',
+    'yaml': '.yml',
+    'json': '.json',
+    'xml': '.xml',
+    'html': '.html',
+    'css': '.css',
+    'rust': '.rs',
+    'go': '.go',
+    'swift': '.swift',
+    'kotlin': '.kt',
+    'ruby': '.rb',
+    'php': '.php',
+    'r': '.r',
+    'matlab': '.m',
+}
+
+# Punctuation whose density separates code from prose; translating it away
+# and comparing lengths counts it in a single C-level pass
+_CODE_PUNCTUATION = '{}[]();=<>'
+_STRIP_CODE_PUNCTUATION = str.maketrans('', '', _CODE_PUNCTUATION)
+
+# Blocks at least this long classify their lines with NumPy; below it the
+# per-call array setup costs more than the Python loop
+VECTORIZE_MIN_CHARS = 4096
+
+# With numba installed, blocks at least this long use the compiled scanner;
+# smaller ones don't justify compiling it on first use
+JIT_MIN_CHARS = 512
 
-@dataclass
+_CODE_CHAR_BYTES = np.frombuffer(b'{}()[];=', dtype=np.uint8)
+_CODE_PAIR_BYTES = (b'->', b'::', b'//')
+# ASCII characters str.strip() treats as whitespace, minus the line separator
+_WHITESPACE_BYTES = np.frombuffer(b' \t\r\x0b\x0c\x1c\x1d\x1e\x1f', dtype=np.uint8)
+
+# Slotted CodeBlocks (no per-instance __dict__) need Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class CodeBlock:
     """Represents an extracted code block"""
     content: str
@@ -21,10 +78,109 @@ class CodeBlock:
     block_type: str = "snippet"  # snippet, function, class, script, example
 
 
+class _PatternScanner:
+    """Match every language pattern against a text in one Hyperscan pass"""
+    
+    def __init__(self, pattern_table: Tuple[Tuple[re.Pattern, int], ...], num_languages: int):
+        expressions, flags = [], []
+        self.language_ids = []
+        self.num_languages = num_languages
+        
+        for pattern, lang_id in pattern_table:
+            # Report each pattern at most once, with Python's Unicode classes
+            hs_flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+            if pattern.flags & re.MULTILINE:
+                hs_flags |= hyperscan.HS_FLAG_MULTILINE
+            if pattern.flags & re.IGNORECASE:
+                hs_flags |= hyperscan.HS_FLAG_CASELESS
+            expressions.append(pattern.pattern.encode('utf-8'))
+            flags.append(hs_flags)
+            self.language_ids.append(lang_id)
+            
+        self.db = hyperscan.Database()
+        self.db.compile(expressions=expressions, ids=list(range(len(expressions))),
+                        elements=len(expressions), flags=flags)
+        self._local = threading.local()
+        
+    def scores(self, text: str) -> List[int]:
+        """Count matching patterns per language id"""
+        scores = [0] * self.num_languages
+        
+        def on_match(pattern_id, start, end, flags, context):
+            scores[self.language_ids[pattern_id]] += 1
+            
+        # Scratch space can't be shared between concurrent scans
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self.db)
+            
+        self.db.scan(text.encode('utf-8', errors='replace'), match_event_handler=on_match, scratch=scratch)
+        return scores
+
+
+def _build_scanner(pattern_table: Tuple[Tuple[re.Pattern, int], ...],
+                   num_languages: int) -> Optional[_PatternScanner]:
+    """Build a Hyperscan scanner for the patterns, or None to use the re module"""
+    if hyperscan is None:
+        return None
+    try:
+        return _PatternScanner(pattern_table, num_languages)
+    except Exception as e:
+        logger.warning(f"Hyperscan pattern compilation failed, using re: {e}")
+        return None
+
+
+@lru_cache(maxsize=512)
+def _guess_language(code: str) -> Optional[str]:
+    """Guess the language with Pygments, which tries every lexer, so repeated snippets are memoized"""
+    try:
+        lexer = guess_lexer(code)
+        return lexer.aliases[0] if lexer.aliases else None
+    except ClassNotFound:
+        return None
+
+
+def _write_file(path: Path, data: bytes):
+    """Write bytes with raw os calls; snippets are small, so file-object overhead dominates"""
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def _load_code_scan():
+    """Import the numba line scanner on first use, or None if numba is missing"""
+    try:
+        from . import _code_scan
+    except ImportError:
+        return None
+    return _code_scan
+
+
+def preload_lexers():
+    """Import Pygments' lexers ahead of time (guess_lexer loads them all on first use)"""
+    try:
+        guess_lexer("pass")
+    except ClassNotFound:
+        pass
+
+
 class CodeBlockExtractor:
     """Extract and classify code blocks from text content"""
     
-    def __init__(self):
+    def __init__(self, min_punctuation_density: float = 0.0, min_confidence: float = 0.0,
+                 min_guess_chars: int = 0):
+        # Blocks with a smaller share of code punctuation are treated as prose
+        # without running any pattern (0 disables the check)
+        self.min_punctuation_density = min_punctuation_density
+        # Segments scoring below this are dropped before being classified
+        self.min_confidence = min_confidence
+        # Shorter code skips the Pygments guess and gets no language (0 = always guess)
+        self.min_guess_chars = min_guess_chars
         self.code_patterns = {
             'python': [
                 re.compile(r'^(def|class|import|from|if __name__)', re.MULTILINE),
@@ -121,6 +277,18 @@ class CodeBlockExtractor:
             re.compile(r'^\s{4,}|\t', re.MULTILINE),  # Indentation
         ]
         
+        # Flattened (pattern, language id) view of code_patterns for the
+        # per-block scoring loop
+        self._lang_names = tuple(self.code_patterns)
+        self._pattern_table = tuple(
+            (pattern, lang_id)
+            for lang_id, patterns in enumerate(self.code_patterns.values())
+            for pattern in patterns
+        )
+        
+        # All language patterns in one database when hyperscan is installed
+        self._scanner = _build_scanner(self._pattern_table, len(self._lang_names))
+        
     def extract(self, text_blocks: List[Any]) -> List[CodeBlock]:
         """Extract code blocks from text content"""
         code_blocks = []
@@ -131,21 +299,37 @@ class CodeBlockExtractor:
                 page_num = getattr(block, 'page_num', 1)
                 
                 # Check if block contains code
-                if self._is_code_block(content):
-                    # Try to detect language
-                    language = self._detect_language(content)
-                    
+                is_code, scores = self._analyze_block(content)
+                if is_code:
                     # Extract individual code segments
                     segments = self._extract_code_segments(content)
                     
+                    # Language detection can fall back to guess_lexer, so
+                    # only run it when there is a segment to label
+                    if not segments:
+                        continue
+                        
+                    if scores is None:
+                        scores = self._language_scores(content)
+                    language = self._detect_language(content, scores)
+                    
                     for seg_content, start_line, end_line in segments:
+                        # A segment spanning the whole block reuses its scores
+                        language_matches = None
+                        if language in self.code_patterns and seg_content == content:
+                            language_matches = scores[self._lang_names.index(language)]
+                            
+                        confidence = self._calculate_confidence(seg_content, language, language_matches)
+                        if confidence < self.min_confidence:
+                            continue
+                            
                         code_block = CodeBlock(
                             content=seg_content,
                             language=language,
                             page_num=page_num,
                             start_line=start_line,
                             end_line=end_line,
-                            confidence=self._calculate_confidence(seg_content, language)
+                            confidence=confidence
                         )
                         
                         # Classify code block type
@@ -157,8 +341,23 @@ class CodeBlockExtractor:
     
     def _is_code_block(self, text: str) -> bool:
         """Determine if text contains code"""
+        return self._analyze_block(text)[0]
+    
+    def _analyze_block(self, text: str) -> Tuple[bool, Optional[List[int]]]:
+        """Decide whether text contains code in one pass over the patterns
+        
+        Returns the verdict and the language scores, which extract reuses
+        for language detection; the scores are None when the general
+        indicators decided on their own.
+        """
         if not text or len(text.strip()) < 10:
-            return False
+            return False, None
+            
+        # Cheap pre-check before any regex work
+        if self.min_punctuation_density > 0:
+            punctuation = len(text) - len(text.translate(_STRIP_CODE_PUNCTUATION))
+            if punctuation <= len(text) * self.min_punctuation_density:
+                return False, None
             
         # Count code indicators
         indicators = 0
@@ -168,43 +367,42 @@ class CodeBlockExtractor:
             if pattern.search(text):
                 indicators += 1
                 
-        # Check for language-specific patterns
-        for patterns in self.code_patterns.values():
-            for pattern in patterns:
-                if pattern.search(text):
-                    indicators += 2
-                    break
-                    
+        if indicators >= 3:
+            return True, None
+            
+        # Each language with a matching pattern counts as two indicators
+        scores = self._language_scores(text)
+        indicators += 2 * sum(1 for score in scores if score)
+        
         # Consider it code if we have enough indicators
-        return indicators >= 3
+        return indicators >= 3, scores
     
-    def _detect_language(self, code: str) -> Optional[str]:
+    def _detect_language(self, code: str, scores: Optional[List[int]] = None) -> Optional[str]:
         """Detect programming language of code"""
-        # First try pattern-based detection
-        best_match = None
-        best_score = 0
+        # First try pattern-based detection; ties go to the first language
+        if scores is None:
+            scores = self._language_scores(code)
+        best_score = max(scores, default=0)
         
-        for lang, patterns in self.code_patterns.items():
-            score = 0
-            for pattern in patterns:
-                if pattern.search(code):
-                    score += 1
-                    
-            if score > best_score:
-                best_score = score
-                best_match = lang
-                
-        if best_match and best_score >= 2:
-            return best_match
+        if best_score >= 2:
+            return self._lang_names[scores.index(best_score)]
             
         # Fallback to Pygments lexer guessing
-        try:
-            lexer = guess_lexer(code)
-            return lexer.aliases[0] if lexer.aliases else None
-        except ClassNotFound:
-            pass
+        if self.min_guess_chars and len(code.strip()) < self.min_guess_chars:
+            return None
             
-        return None
+        return _guess_language(code)
+    
+    def _language_scores(self, text: str) -> List[int]:
+        """Count how many of each language's patterns match the text, indexed like _lang_names"""
+        if self._scanner:
+            return self._scanner.scores(text)
+        
+        scores = [0] * len(self._lang_names)
+        for pattern, lang_id in self._pattern_table:
+            if pattern.search(text):
+                scores[lang_id] += 1
+        return scores
     
     def _extract_code_segments(self, text: str) -> List[Tuple[str, int, int]]:
         """Extract individual code segments from text"""
@@ -216,9 +414,17 @@ class CodeBlockExtractor:
         start_line = 0
         in_code = False
         
+        code_scan = _load_code_scan() if len(text) >= JIT_MIN_CHARS else None
+        if code_scan is not None:
+            code_lines = self._compiled_code_line_mask(code_scan, text, lines)
+        elif len(text) >= VECTORIZE_MIN_CHARS:
+            code_lines = self._code_line_mask(text, lines)
+        else:
+            code_lines = [self._is_code_line(line) for line in lines]
+        
         for i, line in enumerate(lines):
             # Check if line looks like code
-            is_code_line = self._is_code_line(line)
+            is_code_line = code_lines[i]
             
             if is_code_line:
                 if not in_code:
@@ -256,8 +462,66 @@ class CodeBlockExtractor:
         code_chars = ['{', '}', '(', ')', '[', ']', ';', '=', '->', '=>', '::', '//']
         return any(char in line for char in code_chars)
     
-    def _calculate_confidence(self, code: str, language: Optional[str]) -> float:
-        """Calculate confidence score for code detection"""
+    def _code_line_mask(self, text: str, lines: List[str]) -> List[bool]:
+        """Vectorized _is_code_line over every line of text
+        
+        Works on the UTF-8 bytes; lines containing non-ASCII characters are
+        rechecked with _is_code_line since str.strip() also removes Unicode
+        whitespace.
+        """
+        arr = np.frombuffer(text.encode('utf-8', errors='surrogatepass'), dtype=np.uint8)
+        n = len(arr)
+        
+        # Line i spans bytes [starts[i], ends[i])
+        newlines = np.flatnonzero(arr == 0x0A)
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.concatenate((newlines, [n]))
+        lengths = ends - starts
+        
+        def per_line(mask: np.ndarray, stop: np.ndarray = ends) -> np.ndarray:
+            counts = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+            return counts[np.maximum(stop, starts)] - counts[starts]
+        
+        # Lines with code characters or two-character operators
+        is_code = per_line(np.isin(arr, _CODE_CHAR_BYTES)) > 0
+        for pair in _CODE_PAIR_BYTES:
+            pair_mask = (arr[:-1] == pair[0]) & (arr[1:] == pair[1])
+            is_code |= per_line(np.append(pair_mask, False), ends - 1) > 0
+            
+        # Indented lines (tab or four spaces) and whitespace-only lines that
+        # start with a space or tab
+        padded = np.append(arr, np.zeros(4, dtype=np.uint8))
+        first = padded[starts]
+        is_code |= (lengths > 0) & (first == 0x09)
+        four_spaces = lengths >= 4
+        for k in range(4):
+            four_spaces &= padded[starts + k] == 0x20
+        is_code |= four_spaces
+        blank = per_line(np.isin(arr, _WHITESPACE_BYTES)) == lengths
+        is_code |= blank & (lengths > 0) & ((first == 0x20) | (first == 0x09))
+        
+        mask = is_code.tolist()
+        for i in np.flatnonzero(per_line(arr >= 0x80) > 0):
+            mask[i] = self._is_code_line(lines[i])
+        return mask
+    
+    def _compiled_code_line_mask(self, code_scan, text: str, lines: List[str]) -> List[bool]:
+        """_is_code_line over every line of text using the numba scanner"""
+        arr = np.frombuffer(text.encode('utf-8', errors='surrogatepass'), dtype=np.uint8)
+        flags = code_scan.code_line_flags(arr)
+        
+        mask = (flags == code_scan.CODE_LINE).tolist()
+        for i in np.flatnonzero(flags == code_scan.RECHECK_LINE):
+            mask[i] = self._is_code_line(lines[i])
+        return mask
+    
+    def _calculate_confidence(self, code: str, language: Optional[str],
+                              language_matches: Optional[int] = None) -> float:
+        """Calculate confidence score for code detection
+        
+        language_matches is the number of the language's patterns matching
+        code, when the caller already knows it.
+        """
         confidence = 0.5
         
         # Increase confidence if language was detected
@@ -266,8 +530,9 @@ class CodeBlockExtractor:
             
             # Check if code matches detected language patterns
             if language in self.code_patterns:
-                matches = sum(1 for p in self.code_patterns[language] if p.search(code))
-                confidence += min(0.3, matches * 0.1)
+                if language_matches is None:
+                    language_matches = sum(1 for p in self.code_patterns[language] if p.search(code))
+                confidence += min(0.3, language_matches * 0.1)
                 
         # Check code structure
         lines = code.split('\n')
@@ -331,47 +596,21 @@ class CodeBlockExtractor:
         exported_paths = {}
         
         # Group by language
-        language_counts = {}
+        language_counts = Counter()
         
         for block in code_blocks:
             lang = block.language or 'unknown'
-            if lang not in language_counts:
-                language_counts[lang] = 0
             language_counts[lang] += 1
             
             # Determine file extension
-            extensions = {
-                'python': '.py',
-                'javascript': '.js',
-                'java': '.java',
-                'c': '.c',
-                'cpp': '.cpp',
-                'csharp': '.cs',
-                'sql': '.sql',
-                'bash': '.sh',
-                'yaml': '.yml',
-                'json': '.json',
-                'xml': '.xml',
-                'html': '.html',
-                'css': '.css',
-                'rust': '.rs',
-                'go': '.go',
-                'swift': '.swift',
-                'kotlin': '.kt',
-                'ruby': '.rb',
-                'php': '.php',
-                'r': '.r',
-                'matlab': '.m',
-            }
-            
-            ext = extensions.get(lang, '.txt')
+            ext = CODE_FILE_EXTENSIONS.get(lang, '.txt')
             filename = f"{lang}_{block.block_type}_{language_counts[lang]:03d}{ext}"
             filepath = output_dir / filename
             
             # Write code to file
-            filepath.write_text(block.content, encoding='utf-8')
+            _write_file(filepath, block.content.encode('utf-8'))
             exported_paths[id(block)] = filepath
             
-            logger.info(f"Exported {block.block_type} code block to {filepath}")
+            logger.debug(f"Exported {block.block_type} code block to {filepath}")
             
         return exported_paths
\ No newline at end of file
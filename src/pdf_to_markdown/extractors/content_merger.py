@@ -2,15 +2,24 @@
 Content merger for combining text and images in reading order
 """
 
+import heapq
 import logging
+import sys
+from collections import defaultdict
 from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Merging sorts and compares many ContentBlocks; slotted instances (Python
+# 3.10+) are smaller and have faster attribute access
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 
-@dataclass 
+@dataclass(**_SLOTS)
 class ContentBlock:
     """Unified content block that can be text or image"""
     content_type: str  # 'text', 'image', 'table', 'code'
@@ -34,110 +43,95 @@ class ContentMerger:
     def merge_content(self, text_blocks: List[Any], images: List[Any] = None, 
                      tables: List[Any] = None) -> List[ContentBlock]:
         """Merge all content types in reading order"""
-        merged_content = []
-        
-        # Convert text blocks to ContentBlocks
-        for text_block in text_blocks:
-            if hasattr(text_block, 'bbox'):
-                y_pos = text_block.bbox[1] if len(text_block.bbox) > 1 else 0
-                height = text_block.bbox[3] - text_block.bbox[1] if len(text_block.bbox) > 3 else 20
-            else:
-                y_pos = 0
-                height = 20
-                
-            merged_content.append(ContentBlock(
-                content_type='text',
-                content=text_block,
-                page_num=getattr(text_block, 'page_num', 1),
-                y_position=y_pos,
-                height=height
-            ))
-        
-        # Convert images to ContentBlocks
-        if images:
-            for img in images:
-                if hasattr(img, 'bbox'):
-                    y_pos = img.bbox[1] if len(img.bbox) > 1 else 0
-                    height = img.bbox[3] - img.bbox[1] if len(img.bbox) > 3 else 100
-                else:
-                    y_pos = 0
-                    height = 100
-                    
-                merged_content.append(ContentBlock(
-                    content_type='image',
-                    content=img,
-                    page_num=getattr(img, 'page_num', 1),
-                    y_position=y_pos,
-                    height=height
-                ))
-        
-        # Convert tables to ContentBlocks
-        if tables:
-            for table in tables:
-                if hasattr(table, 'bbox'):
-                    y_pos = table.bbox[1] if len(table.bbox) > 1 else 0
-                    height = table.bbox[3] - table.bbox[1] if len(table.bbox) > 3 else 50
-                else:
-                    y_pos = 0
-                    height = 50
-                    
-                merged_content.append(ContentBlock(
-                    content_type='table',
-                    content=table,
-                    page_num=getattr(table, 'page_num', 1),
-                    y_position=y_pos,
-                    height=height
-                ))
+        # Parallel columns for every block; ContentBlocks are only built
+        # once the reading order is known
+        columns = ([], [], [], [], [])
+        self._collect('text', text_blocks, 20, columns)
+        self._collect('image', images or [], 100, columns)
+        self._collect('table', tables or [], 50, columns)
+        content_types, contents, page_nums, y_positions, heights = columns
         
-        # Sort by page, then by y-position (reading order)
-        merged_content.sort(key=lambda x: (x.page_num, x.y_position))
+        # Sort by page, then by y-position (reading order); lexsort is
+        # stable, so ties keep text before images before tables
+        order = np.lexsort((np.asarray(y_positions, dtype=float), np.asarray(page_nums)))
+        merged_content = [
+            ContentBlock(
+                content_type=content_types[i],
+                content=contents[i],
+                page_num=page_nums[i],
+                y_position=y_positions[i],
+                height=heights[i]
+            )
+            for i in order.tolist()
+        ]
         
         # Handle side-by-side content (images next to text)
         merged_content = self._handle_side_by_side(merged_content)
         
         return merged_content
     
+    def _collect(self, content_type: str, items: List[Any], default_height: float,
+                 columns: Tuple[list, list, list, list, list]):
+        """Append each item's type, object, page and vertical extent to columns"""
+        content_types, contents, page_nums, y_positions, heights = columns
+        
+        for item in items:
+            bbox = getattr(item, 'bbox', ())
+            content_types.append(content_type)
+            contents.append(item)
+            page_nums.append(getattr(item, 'page_num', 1))
+            y_positions.append(bbox[1] if len(bbox) > 1 else 0)
+            heights.append(bbox[3] - bbox[1] if len(bbox) > 3 else default_height)
+    
     def _handle_side_by_side(self, content_blocks: List[ContentBlock]) -> List[ContentBlock]:
-        """Handle content that appears side-by-side (like wrapped text around images)"""
+        """Handle content that appears side-by-side (like wrapped text around images)
+        
+        Expects blocks sorted by page and y-position. A sweep down each page
+        keeps the text blocks that are still open (end below the current
+        top) in a heap keyed by their bottom edge, so each image is only
+        compared against text it can actually overlap. A small image is
+        moved in front of the first text block it sits beside, even when
+        other blocks come between them.
+        """
         if len(content_blocks) < 2:
             return content_blocks
             
-        result = []
-        i = 0
+        # Images to emit just before the text block at a given index
+        wrapped_images = defaultdict(list)
+        moved = set()
+        open_text = []  # (y_end, index) of text blocks on the current page
+        page_num = None
         
-        while i < len(content_blocks):
-            current = content_blocks[i]
-            
-            # Check if next item is side-by-side
-            if i + 1 < len(content_blocks):
-                next_block = content_blocks[i + 1]
+        for i, block in enumerate(content_blocks):
+            if block.page_num != page_num:
+                page_num = block.page_num
+                open_text = []
                 
-                # Check for significant vertical overlap (side-by-side)
-                if self._blocks_overlap(current, next_block):
-                    # For side-by-side content, put image first if it's smaller
-                    if current.content_type == 'image' and next_block.content_type == 'text':
-                        result.append(current)
-                        result.append(next_block)
-                        i += 2
-                    elif current.content_type == 'text' and next_block.content_type == 'image':
-                        # Check if image is small (likely inline/wrapped)
-                        if next_block.height < current.height * 1.5:
-                            result.append(next_block)  # Image first for wrapping
-                            result.append(current)
-                            i += 2
-                        else:
-                            result.append(current)
-                            i += 1
-                    else:
-                        result.append(current)
-                        i += 1
-                else:
-                    result.append(current)
-                    i += 1
-            else:
-                result.append(current)
-                i += 1
+            # Text ending above this block can't overlap it or anything after
+            while open_text and open_text[0][0] <= block.y_position:
+                heapq.heappop(open_text)
                 
+            if block.content_type == 'text':
+                heapq.heappush(open_text, (block.y_end, i))
+            elif block.content_type == 'image' and open_text:
+                # Put the image first for wrapping if it is small next to the text
+                target = min(
+                    (j for _, j in open_text
+                     if block.height < content_blocks[j].height * 1.5
+                     and self._blocks_overlap(content_blocks[j], block)),
+                    default=None
+                )
+                if target is not None:
+                    wrapped_images[target].append(block)
+                    moved.add(i)
+                    
+        result = []
+        for i, block in enumerate(content_blocks):
+            if i in moved:
+                continue
+            result.extend(wrapped_images.get(i, ()))
+            result.append(block)
+            
         return result
     
     def _blocks_overlap(self, block1: ContentBlock, block2: ContentBlock) -> bool:
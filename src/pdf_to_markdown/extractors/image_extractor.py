@@ -5,14 +5,28 @@ from PIL import Image
 import io
 from pathlib import Path
 import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-import cv2
 import numpy as np
 
+from .pdf_source import PDFSource, is_path_source, source_to_bytes, open_fitz_document
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional speedup
+    xxhash = None
+
 logger = logging.getLogger(__name__)
 
+# Side of the thumbnail the diagram histogram is computed on
+_DIAGRAM_SAMPLE_SIZE = 128
+
+# Slotted ExtractedImages (no per-instance __dict__) need Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class ExtractedImage:
     """Represents an extracted image with metadata"""
     image_data: bytes
@@ -25,31 +39,73 @@ class ExtractedImage:
     caption: Optional[str] = None
     alt_text: Optional[str] = None
     image_type: str = "figure"  # figure, diagram, chart, photo, logo, etc.
+    phash: Optional[int] = None  # 64-bit dHash, set during near-duplicate detection
+
+
+def _make_hasher(algorithm: str):
+    """Return a function hashing image bytes to a hex digest"""
+    if algorithm == 'xxh3':
+        if xxhash is not None:
+            return xxhash.xxh3_64_hexdigest
+        # SHA-1 is hardware accelerated on current CPUs and well ahead of MD5
+        logger.debug("xxhash not installed, falling back to sha1 for image hashes")
+        algorithm = 'sha1'
+    constructor = getattr(hashlib, algorithm)
+    return lambda data: constructor(data).hexdigest()
+
+
+def _dhash(image_data: bytes) -> Optional[int]:
+    """64-bit difference hash: whether each pixel of a 9x8 grayscale thumbnail is brighter than its left neighbour"""
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            pixels = np.asarray(img.convert('L').resize((9, 8)), dtype=np.int16)
+    except Exception as e:
+        logger.debug(f"Could not compute perceptual hash: {e}")
+        return None
+    return int.from_bytes(np.packbits(pixels[:, 1:] > pixels[:, :-1]).tobytes(), 'big')
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each uint64"""
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+        return np.bitwise_count(values)
+    bits = np.unpackbits(values[..., np.newaxis].view(np.uint8), axis=-1)
+    return bits.sum(axis=-1)
 
 
 class ImageExtractor:
     """Advanced image extraction from PDF files"""
     
     def __init__(self, min_width: int = 50, min_height: int = 50, 
-                 extract_inline: bool = True, detect_duplicates: bool = True):
+                 extract_inline: bool = True, detect_duplicates: bool = True,
+                 hash_algorithm: str = 'xxh3', near_duplicate_distance: int = 0,
+                 page_workers: int = 1):
         self.min_width = min_width
         self.min_height = min_height
         self.extract_inline = extract_inline
         self.detect_duplicates = detect_duplicates
+        self.hash_algorithm = hash_algorithm
+        # Worker processes to split a document's pages across (1 = in-process)
+        self.page_workers = page_workers
+        # Images whose dHashes differ in at most this many bits are treated
+        # as re-encodings of the same picture (0 compares exact bytes only)
+        self.near_duplicate_distance = near_duplicate_distance
         self.extracted_hashes = set()
+        self._hash = _make_hasher(hash_algorithm)
+        # Set once OpenCV fails to import; only edge detection needs it
+        self._cv2_missing = False
         
-    def extract(self, pdf_path: Path) -> List[ExtractedImage]:
+    def extract(self, pdf_path: PDFSource) -> List[ExtractedImage]:
         """Extract all images from PDF"""
-        images = []
+        images = None
         
-        with fitz.open(str(pdf_path)) as doc:
-            for page_num, page in enumerate(doc, 1):
-                # Extract embedded images
-                images.extend(self._extract_page_images(page, page_num))
+        with open_fitz_document(pdf_path) as doc:
+            page_count = len(doc)
+            if self.page_workers <= 1 or page_count < 2:
+                images = self._extract_page_range(doc, 1, page_count)
                 
-                # Extract inline images if enabled
-                if self.extract_inline:
-                    images.extend(self._extract_inline_images(page, page_num))
+        if images is None:
+            images = self._extract_parallel(pdf_path, page_count)
                     
         # Remove duplicates if enabled
         if self.detect_duplicates:
@@ -60,34 +116,146 @@ class ImageExtractor:
         
         return images
     
-    def _extract_page_images(self, page, page_num: int) -> List[ExtractedImage]:
-        """Extract embedded images from a page"""
+    def _extract_parallel(self, pdf_path: PDFSource, page_count: int) -> List[ExtractedImage]:
+        """Split the document into page ranges and extract their images in worker processes"""
+        # Workers reopen the file themselves; in-memory PDFs are sent as bytes
+        source = pdf_path if is_path_source(pdf_path) else source_to_bytes(pdf_path)
+        num_workers = min(self.page_workers, page_count)
+        chunk_size = max(1, page_count // num_workers)
+        
+        images = []
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(_extract_image_range, source, first_page,
+                                min(first_page + chunk_size - 1, page_count), self._range_settings())
+                for first_page in range(1, page_count + 1, chunk_size)
+            ]
+            
+            # Reassemble in page order so duplicates keep their first occurrence
+            for future in futures:
+                images.extend(future.result())
+                
+        return images
+    
+    def _range_settings(self) -> Dict[str, Any]:
+        """Settings a worker needs to extract a page range like this extractor"""
+        return {
+            'min_width': self.min_width,
+            'min_height': self.min_height,
+            'extract_inline': self.extract_inline,
+            'detect_duplicates': self.detect_duplicates,
+            'hash_algorithm': self.hash_algorithm,
+        }
+    
+    def _extract_page_range(self, doc, first_page: int, last_page: int) -> List[ExtractedImage]:
+        """Extract images from pages first_page..last_page (1-based, inclusive), before dedup"""
+        images = []
+        xref_cache = {}
+        # Hashes of images already returned, so repeats (logos, icons) are
+        # dropped before they are located and wrapped; inline images use
+        # pixel hashes, so repeats also skip PNG encoding
+        seen_hashes = set() if self.detect_duplicates else None
+        seen_pixels = set() if self.detect_duplicates else None
+        
+        for page_num in range(first_page, last_page + 1):
+            page = doc[page_num - 1]
+            # Placements are listed up front only when the inline pass needs them too
+            image_info = self._get_image_info(page, page_num) if self.extract_inline else None
+            
+            # Extract embedded images
+            images.extend(self._extract_page_images(page, page_num, xref_cache, image_info, seen_hashes))
+            
+            # Extract inline images if enabled
+            if self.extract_inline:
+                images.extend(self._extract_inline_images(page, page_num, seen_pixels, image_info))
+                
+        return images
+    
+    def extract_page(self, page, page_num: int, seen_hashes: Optional[set] = None,
+                     xref_cache: Optional[Dict[int, Optional[tuple]]] = None) -> List[ExtractedImage]:
+        """Extract and classify images from a single page (used for streaming)
+        
+        seen_hashes carries duplicate detection across pages; hashes of the
+        returned images are added to it. Passing the same xref_cache for
+        every page of a document avoids re-decoding shared images.
+        """
+        image_info = self._get_image_info(page, page_num)
+        images = self._extract_page_images(page, page_num, xref_cache, image_info)
+        if self.extract_inline:
+            images.extend(self._extract_inline_images(page, page_num, image_info=image_info))
+            
+        if self.detect_duplicates:
+            images = self._remove_duplicates(images)
+            if seen_hashes is not None:
+                images = [img for img in images if img.hash not in seen_hashes]
+                seen_hashes.update(img.hash for img in images)
+            
+        return self._classify_images(images)
+    
+    def _get_image_info(self, page, page_num: int) -> List[dict]:
+        """List where each image is drawn on a page, with its xref (0 for inline images)"""
+        try:
+            return page.get_image_info(xrefs=True)
+        except Exception as e:
+            logger.debug(f"Could not list image placements on page {page_num}: {e}")
+            return []
+    
+    def _extract_page_images(self, page, page_num: int,
+                             xref_cache: Optional[Dict[int, Optional[tuple]]] = None,
+                             image_info: Optional[List[dict]] = None,
+                             seen_hashes: Optional[set] = None) -> List[ExtractedImage]:
+        """Extract embedded images from a page
+        
+        xref_cache maps image xrefs to their decoded data for the whole
+        document, so images repeated on many pages (logos, headers) are
+        only extracted and hashed once. image_info is the page's
+        get_image_info(xrefs=True) result, if the caller already has it.
+        Images whose hash is in seen_hashes are skipped; hashes of the
+        returned images are added to it.
+        """
         images = []
         image_list = page.get_images()
+        seen_xrefs = set()
+        # Position of each image's first placement, built on first use with
+        # one lookup for the page instead of a get_image_rects call per image
+        image_rects = None
         
         for img_index, img in enumerate(image_list):
             try:
                 # Get image reference
                 xref = img[0]
                 
-                # Extract image data
-                base_image = page.parent.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                # Get image properties
-                width = base_image["width"]
-                height = base_image["height"]
-                ext = base_image["ext"]
+                # An image placed twice on a page would get the same bbox
+                if xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
                 
+                if xref_cache is not None and xref in xref_cache:
+                    loaded = xref_cache[xref]
+                else:
+                    loaded = self._load_image(page.parent, xref)
+                    if xref_cache is not None:
+                        xref_cache[xref] = loaded
+                        
                 # Skip small images
-                if width < self.min_width or height < self.min_height:
+                if loaded is None:
                     continue
+                image_bytes, width, height, ext, image_hash = loaded
+                
+                if seen_hashes is not None:
+                    if image_hash in seen_hashes:
+                        continue
+                    seen_hashes.add(image_hash)
                     
                 # Get image position on page
-                bbox = self._get_image_bbox(page, xref)
-                
-                # Calculate hash for duplicate detection
-                image_hash = hashlib.md5(image_bytes).hexdigest()
+                if image_rects is None:
+                    if image_info is None:
+                        image_info = self._get_image_info(page, page_num)
+                    image_rects = {}
+                    for info in image_info:
+                        if info.get('xref'):
+                            image_rects.setdefault(info['xref'], tuple(info['bbox']))
+                bbox = self._get_image_bbox(page, xref, image_rects)
                 
                 images.append(ExtractedImage(
                     image_data=image_bytes,
@@ -104,24 +272,117 @@ class ImageExtractor:
                 
         return images
     
-    def _extract_inline_images(self, page, page_num: int) -> List[ExtractedImage]:
-        """Extract inline images (rendered as part of page content)"""
+    def _load_image(self, doc, xref: int) -> Optional[tuple]:
+        """Decode an embedded image, returning (bytes, width, height, ext, hash) or None if too small"""
+        # Extract image data
+        base_image = doc.extract_image(xref)
+        
+        # Get image properties
+        width = base_image["width"]
+        height = base_image["height"]
+        
+        # Skip small images
+        if width < self.min_width or height < self.min_height:
+            return None
+            
+        # Calculate hash for duplicate detection
+        image_bytes = base_image["image"]
+        return image_bytes, width, height, base_image["ext"], self._hash(image_bytes)
+    
+    def _extract_inline_images(self, page, page_num: int, seen_pixels: Optional[set] = None,
+                               image_info: Optional[List[dict]] = None) -> List[ExtractedImage]:
+        """Extract inline images (rendered as part of page content)
+        
+        PyMuPDF reports where every image on the page is drawn, so those
+        regions are rendered directly; edge detection over a full-page
+        render is only used for pages without any image placements.
+        
+        Inline images are hashed on their raw pixels. When seen_pixels is
+        given, regions already in it are skipped before being encoded.
+        """
+        if image_info is None:
+            image_info = self._get_image_info(page, page_num)
+            
+        if not image_info:
+            return self._detect_inline_images(page, page_num, seen_pixels)
+            
+        # Images with an xref were already extracted as embedded images
+        return self._render_regions(
+            page, page_num, [fitz.Rect(info['bbox']) for info in image_info if not info.get('xref')],
+            seen_pixels
+        )
+    
+    def _pixel_hash(self, pixels, width: int, height: int, seen_pixels: Optional[set]) -> Optional[str]:
+        """Hash raw pixels, or return None if seen_pixels already has them"""
+        # The size is part of the key: equal bytes in different shapes (e.g.
+        # blank regions) are different images
+        pixel_hash = f"{self._hash(pixels)}-{width}x{height}"
+        if seen_pixels is not None:
+            if pixel_hash in seen_pixels:
+                return None
+            seen_pixels.add(pixel_hash)
+        return pixel_hash
+    
+    def _render_regions(self, page, page_num: int, rects: List[fitz.Rect],
+                        seen_pixels: Optional[set] = None) -> List[ExtractedImage]:
+        """Render the given page regions as PNG images"""
+        images = []
+        mat = fitz.Matrix(3, 3)  # 3x zoom for better quality
+        
+        for rect in rects:
+            # Skip small regions
+            if rect.width < self.min_width or rect.height < self.min_height:
+                continue
+                
+            try:
+                pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
+                image_hash = self._pixel_hash(pix.samples_mv, pix.width, pix.height, seen_pixels)
+                if image_hash is None:
+                    continue
+                image_bytes = pix.tobytes("png")
+            except Exception as e:
+                logger.warning(f"Failed to render inline image on page {page_num}: {e}")
+                continue
+                
+            images.append(ExtractedImage(
+                image_data=image_bytes,
+                page_num=page_num,
+                bbox=(rect.x0, rect.y0, rect.x1, rect.y1),
+                width=pix.width // 3,
+                height=pix.height // 3,
+                format='png',
+                hash=image_hash
+            ))
+            
+        return images
+    
+    def _detect_inline_images(self, page, page_num: int,
+                              seen_pixels: Optional[set] = None) -> List[ExtractedImage]:
+        """Find image-like regions in a full-page render with edge detection"""
         images = []
+        if self._cv2_missing:
+            return images
+        
+        try:
+            import cv2  # Optional: pip install pdf-to-markdown-enterprise[inline-images]
+        except ImportError:
+            logger.warning("OpenCV not installed, skipping inline image detection. "
+                           "Install with: pip install pdf-to-markdown-enterprise[inline-images]")
+            # Placement-based inline extraction doesn't use OpenCV, so keep it on
+            self._cv2_missing = True
+            return images
         
         try:
             # Get page pixmap at high resolution
             mat = fitz.Matrix(3, 3)  # 3x zoom for better quality
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            
-            # Convert to PIL Image
-            img_data = pix.pil_tobytes(format="PNG")
-            img = Image.open(io.BytesIO(img_data))
+            pix = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False)
             
-            # Convert to OpenCV format for processing
-            opencv_image = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+            # View the pixmap's RGB samples in place; no PNG round trip
+            pixels = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+            rgb = pixels[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
             
             # Detect image regions using edge detection
-            image_regions = self._detect_image_regions(opencv_image)
+            image_regions = self._detect_image_regions(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY))
             
             for region in image_regions:
                 x, y, w, h = region
@@ -131,16 +392,18 @@ class ImageExtractor:
                     continue
                     
                 # Extract region
-                cropped = img.crop((x, y, x + w, y + h))
+                region = np.ascontiguousarray(rgb[y:y + h, x:x + w])
                 
+                # Calculate hash
+                image_hash = self._pixel_hash(region, w, h, seen_pixels)
+                if image_hash is None:
+                    continue
+                    
                 # Convert to bytes
                 img_buffer = io.BytesIO()
-                cropped.save(img_buffer, format='PNG')
+                Image.fromarray(region).save(img_buffer, format='PNG')
                 image_bytes = img_buffer.getvalue()
                 
-                # Calculate hash
-                image_hash = hashlib.md5(image_bytes).hexdigest()
-                
                 # Convert coordinates back to page coordinates
                 bbox = (x/3, y/3, (x+w)/3, (y+h)/3)
                 
@@ -159,43 +422,38 @@ class ImageExtractor:
             
         return images
     
-    def _get_image_bbox(self, page, xref: int) -> Tuple[float, float, float, float]:
+    def _get_image_bbox(self, page, xref: int,
+                        image_rects: Dict[int, Tuple[float, float, float, float]]) -> Tuple[float, float, float, float]:
         """Get bounding box of image on page"""
-        try:
-            img_list = page.get_image_rects(xref)
-            if img_list:
-                rect = img_list[0]
-                return (rect.x0, rect.y0, rect.x1, rect.y1)
-        except:
-            pass
+        if xref in image_rects:
+            return image_rects[xref]
             
         # Fallback to page dimensions
         return (0, 0, page.rect.width, page.rect.height)
     
-    def _detect_image_regions(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
-        """Detect distinct image regions in page using computer vision"""
+    def _detect_image_regions(self, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Detect distinct image regions in a grayscale page render using computer vision"""
+        import cv2
+        
         regions = []
         
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
             # Apply edge detection
             edges = cv2.Canny(gray, 50, 150)
             
             # Find contours
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                # Get bounding rectangle
-                x, y, w, h = cv2.boundingRect(contour)
+            if not contours:
+                return regions
                 
-                # Filter based on area and aspect ratio
-                area = w * h
-                if area > 5000:  # Minimum area threshold
-                    aspect_ratio = w / h if h > 0 else 0
-                    if 0.2 < aspect_ratio < 5:  # Reasonable aspect ratio
-                        regions.append((x, y, w, h))
+            # Bounding rectangles as one (n, 4) array, filtered in a single pass
+            rects = np.fromiter((cv2.boundingRect(c) for c in contours),
+                                dtype=np.dtype((np.int64, 4)), count=len(contours))
+            w, h = rects[:, 2], rects[:, 3]
+            aspect_ratio = w / np.maximum(h, 1)
+            # Minimum area threshold and reasonable aspect ratio
+            mask = (w * h > 5000) & (aspect_ratio > 0.2) & (aspect_ratio < 5)
+            regions = [tuple(rect) for rect in rects[mask].tolist()]
                         
         except Exception as e:
             logger.debug(f"Error detecting image regions: {e}")
@@ -214,8 +472,37 @@ class ImageExtractor:
             else:
                 logger.debug(f"Skipping duplicate image with hash {img.hash}")
                 
+        if self.near_duplicate_distance and len(unique_images) > 1:
+            unique_images = self._remove_near_duplicates(unique_images)
+            
         return unique_images
     
+    def _remove_near_duplicates(self, images: List[ExtractedImage]) -> List[ExtractedImage]:
+        """Drop images whose perceptual hash is close to an earlier kept image"""
+        for img in images:
+            if img.phash is None:
+                img.phash = _dhash(img.image_data)
+                
+        hashed = [i for i, img in enumerate(images) if img.phash is not None]
+        if len(hashed) < 2:
+            return images
+            
+        # Compare against kept images only, so near-duplicates don't chain
+        # into dropping images that differ from the one actually kept
+        kept = np.empty(len(hashed), dtype=np.uint64)
+        kept_count = 0
+        dropped = set()
+        for i in hashed:
+            phash = np.uint64(images[i].phash)
+            if (_popcount(kept[:kept_count] ^ phash) <= self.near_duplicate_distance).any():
+                dropped.add(i)
+                logger.debug(f"Skipping near-duplicate image with hash {images[i].hash}")
+            else:
+                kept[kept_count] = phash
+                kept_count += 1
+                
+        return [img for i, img in enumerate(images) if i not in dropped]
+    
     def _classify_images(self, images: List[ExtractedImage]) -> List[ExtractedImage]:
         """Classify images by type based on characteristics"""
         for img in images:
@@ -246,6 +533,12 @@ class ImageExtractor:
     def _is_likely_diagram(self, image: Image.Image) -> bool:
         """Check if image is likely a diagram (high contrast, geometric shapes)"""
         try:
+            # Nearest-neighbour sampling keeps the distribution of pixel
+            # values, so a thumbnail's histogram stands in for the full image
+            if image.width > _DIAGRAM_SAMPLE_SIZE or image.height > _DIAGRAM_SAMPLE_SIZE:
+                image = image.resize((min(image.width, _DIAGRAM_SAMPLE_SIZE),
+                                      min(image.height, _DIAGRAM_SAMPLE_SIZE)), Image.NEAREST)
+                
             # Convert to grayscale
             gray = image.convert('L')
             
@@ -270,14 +563,16 @@ class ImageExtractor:
         try:
             # Simple heuristic: charts often have white/light backgrounds
             # and distinct color regions
-            pixels = image.getdata()
-            
-            if isinstance(pixels[0], int):
+            if len(image.getbands()) == 1:
                 # Grayscale image, less likely to be a chart
                 return False
                 
-            # Count distinct colors (simplified)
-            unique_colors = len(set(list(pixels)[:1000]))  # Sample first 1000 pixels
+            # Count distinct colors in the first 1000 pixels (simplified);
+            # only the rows holding them are converted to an array
+            rows = min(image.height, -(-1000 // image.width))
+            sample = np.asarray(image.crop((0, 0, image.width, rows)))
+            sample = sample.reshape(-1, sample.shape[-1])[:1000]
+            unique_colors = len(np.unique(sample, axis=0))
             
             if unique_colors > 10 and unique_colors < 100:
                 return True
@@ -314,4 +609,12 @@ class ImageExtractor:
             
             logger.info(f"Saved image to {filepath}")
             
-        return saved_paths
\ No newline at end of file
+        return saved_paths
+
+
+def _extract_image_range(pdf_source: PDFSource, first_page: int, last_page: int,
+                         settings: Dict[str, Any]) -> List[ExtractedImage]:
+    """Extract a page range's images in a worker process (module-level so it can be pickled)"""
+    extractor = ImageExtractor(**settings)
+    with open_fitz_document(pdf_source) as doc:
+        return extractor._extract_page_range(doc, first_page, last_page)
@@ -0,0 +1,103 @@
+"""
+Helpers for opening a PDF given either a file path or an in-memory buffer
+"""
+
+import io
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Union
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+# A PDF can be passed around as a path or as its raw bytes (e.g. an mmap)
+PDFSource = Union[str, Path, bytes, bytearray, memoryview, mmap.mmap]
+
+
+def is_path_source(source: PDFSource) -> bool:
+    """Check if the source refers to a file on disk"""
+    return isinstance(source, (str, Path))
+
+
+def source_to_bytes(source: PDFSource) -> bytes:
+    """Return the PDF contents as bytes (reads the file for path sources)"""
+    if is_path_source(source):
+        return Path(source).read_bytes()
+    return bytes(source)
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a buffer, without copying it"""
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._pos = 0
+        
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+    
+    def readinto(self, b):
+        data = self._view[self._pos:self._pos + len(b)]
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+    
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+@contextmanager
+def open_fitz_document(source: PDFSource):
+    """Open a PyMuPDF document without copying in-memory buffers"""
+    if is_path_source(source):
+        with fitz.open(str(source)) as doc:
+            yield doc
+        return
+
+    # PyMuPDF reads straight from the buffer through a memoryview
+    view = memoryview(source)
+    try:
+        doc = fitz.open(stream=view, filetype='pdf')
+        try:
+            yield doc
+        finally:
+            doc.close()
+            doc.stream = None
+    finally:
+        view.release()
+
+
+@contextmanager
+def open_pdfplumber(source: PDFSource):
+    """Open a pdfplumber document from a path or buffer"""
+    if is_path_source(source):
+        with pdfplumber.open(str(source)) as pdf:
+            yield pdf
+        return
+
+    if isinstance(source, mmap.mmap):
+        # Read through a view with its own position so concurrent readers of
+        # the same mmap don't move each other's file pointer
+        stream = io.BufferedReader(_BufferReader(source))
+    else:
+        stream = io.BytesIO(source)
+
+    # pdfplumber leaves streams it didn't open to the caller
+    with stream, pdfplumber.open(stream) as pdf:
+        yield pdf
@@ -1,19 +1,31 @@
 import logging
-from typing import List, Dict, Any, Optional
-import pandas as pd
-import pdfplumber
-import tabula
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 from pathlib import Path
+import io
 import re
+import sys
+
+from .pdf_source import PDFSource, is_path_source, source_to_bytes, open_pdfplumber
+
+if TYPE_CHECKING:
+    # pandas is imported on first use; pages without tables never need it
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# _clean_text runs for every cell of every table
+_WHITESPACE_RE = re.compile(r'\s+')
+_EMPTY_CELL_TEXT = frozenset({'nan', 'none'})
+
+# Slotted ExtractedTables (no per-instance __dict__) need Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class ExtractedTable:
     """Represents an extracted table with metadata"""
-    data: pd.DataFrame
+    data: 'pd.DataFrame'
     page_num: int
     bbox: tuple
     caption: Optional[str] = None
@@ -29,25 +41,30 @@ class TableExtractor:
         self.min_rows = min_rows
         self.min_cols = min_cols
         
-    def extract(self, pdf_path: Path) -> List[ExtractedTable]:
-        """Extract all tables from PDF"""
+    def extract(self, pdf_path: PDFSource, source_path: Optional[Path] = None) -> List[ExtractedTable]:
+        """Extract all tables from PDF
+        
+        source_path is the file an in-memory pdf_path was read from; camelot
+        only reads files, so it is given this path instead.
+        """
         tables = []
+        camelot_source = pdf_path if source_path is None else source_path
         
         if self.method == "auto":
             # Try multiple methods and combine results
             tables.extend(self._extract_with_pdfplumber(pdf_path))
             
             if not tables:
-                tables.extend(self._extract_with_tabula(pdf_path))
-                
-            if not tables:
-                tables.extend(self._extract_with_camelot(pdf_path))
+                tables.extend(self._extract_with_fallbacks(pdf_path, camelot_source))
         elif self.method == "pdfplumber":
             tables = self._extract_with_pdfplumber(pdf_path)
         elif self.method == "tabula":
             tables = self._extract_with_tabula(pdf_path)
         elif self.method == "camelot":
-            tables = self._extract_with_camelot(pdf_path)
+            tables = self._extract_with_camelot(camelot_source)
+            
+        if not tables:
+            return tables
             
         # Filter and clean tables
         tables = self._filter_valid_tables(tables)
@@ -56,41 +73,82 @@ class TableExtractor:
         
         return tables
     
-    def _extract_with_pdfplumber(self, pdf_path: Path) -> List[ExtractedTable]:
+    def extract_page(self, page, page_num: int) -> List[ExtractedTable]:
+        """Extract tables from a single pdfplumber page (used for streaming)"""
+        try:
+            tables = self._extract_pdfplumber_page(page, page_num)
+        except Exception as e:
+            logger.warning(f"PDFPlumber table extraction failed on page {page_num}: {e}")
+            return []
+            
+        if not tables:
+            return tables
+            
+        tables = self._filter_valid_tables(tables)
+        tables = self._clean_tables(tables)
+        return self._classify_tables(tables)
+    
+    def _extract_with_pdfplumber(self, pdf_path: PDFSource) -> List[ExtractedTable]:
         """Extract tables using pdfplumber"""
         extracted_tables = []
         
         try:
-            with pdfplumber.open(str(pdf_path)) as pdf:
+            with open_pdfplumber(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
-                    page_tables = page.extract_tables()
-                    
-                    for table_data in page_tables:
-                        if table_data and len(table_data) >= self.min_rows:
-                            # Convert to DataFrame
-                            df = pd.DataFrame(table_data[1:], columns=table_data[0])
-                            
-                            if len(df.columns) >= self.min_cols:
-                                extracted_tables.append(ExtractedTable(
-                                    data=df,
-                                    page_num=page_num,
-                                    bbox=(0, 0, page.width, page.height),
-                                    headers=list(df.columns)
-                                ))
+                    extracted_tables.extend(self._extract_pdfplumber_page(page, page_num))
                                 
         except Exception as e:
             logger.warning(f"PDFPlumber table extraction failed: {e}")
             
         return extracted_tables
     
-    def _extract_with_tabula(self, pdf_path: Path) -> List[ExtractedTable]:
+    def _extract_pdfplumber_page(self, page, page_num: int) -> List[ExtractedTable]:
+        """Extract raw tables from a pdfplumber page"""
+        extracted_tables = []
+        page_tables = page.extract_tables()
+        if not page_tables:
+            return extracted_tables
+            
+        import pandas as pd
+        
+        for table_data in page_tables:
+            if table_data and len(table_data) >= self.min_rows:
+                # Convert to DataFrame
+                df = pd.DataFrame(table_data[1:], columns=table_data[0])
+                
+                if len(df.columns) >= self.min_cols:
+                    extracted_tables.append(ExtractedTable(
+                        data=df,
+                        page_num=page_num,
+                        bbox=(0, 0, page.width, page.height),
+                        headers=list(df.columns)
+                    ))
+                    
+        return extracted_tables
+    
+    def _extract_with_fallbacks(self, pdf_path: PDFSource,
+                                camelot_source: PDFSource) -> List[ExtractedTable]:
+        """Try tabula, then camelot only if tabula found no tables
+        
+        A started camelot run can't be cancelled, so running both side by
+        side would spend its CPU time even when tabula's tables are used.
+        """
+        tables = self._extract_with_tabula(pdf_path)
+        if tables:
+            return tables
+        return self._extract_with_camelot(camelot_source)
+    
+    def _extract_with_tabula(self, pdf_path: PDFSource) -> List[ExtractedTable]:
         """Extract tables using tabula-py"""
         extracted_tables = []
         
         try:
+            import tabula
+            
             # Read tables from all pages
+            tabula_input = str(pdf_path) if is_path_source(pdf_path) else io.BytesIO(source_to_bytes(pdf_path))
             dfs = tabula.read_pdf(
-                str(pdf_path),
+                tabula_input,
                 pages='all',
                 multiple_tables=True,
                 pandas_options={'header': 0}
@@ -109,15 +167,21 @@ class TableExtractor:
                         headers=list(df.columns)
                     ))
                     
+        except ImportError:
+            logger.warning("tabula-py not installed. Install with: pip install pdf-to-markdown-enterprise[tables-tabula]")
         except Exception as e:
             logger.warning(f"Tabula table extraction failed: {e}")
             
         return extracted_tables
     
-    def _extract_with_camelot(self, pdf_path: Path) -> List[ExtractedTable]:
+    def _extract_with_camelot(self, pdf_path: PDFSource) -> List[ExtractedTable]:
         """Extract tables using camelot-py"""
         extracted_tables = []
         
+        if not is_path_source(pdf_path):
+            logger.warning("Camelot requires a file path, skipping in-memory PDF")
+            return extracted_tables
+            
         try:
             import camelot
             
@@ -140,7 +204,7 @@ class TableExtractor:
                     ))
                     
         except ImportError:
-            logger.warning("Camelot not installed. Install with: pip install camelot-py[cv]")
+            logger.warning("Camelot not installed. Install with: pip install pdf-to-markdown-enterprise[tables-camelot]")
         except Exception as e:
             logger.warning(f"Camelot table extraction failed: {e}")
             
@@ -170,6 +234,8 @@ class TableExtractor:
     
     def _clean_tables(self, tables: List[ExtractedTable]) -> List[ExtractedTable]:
         """Clean and normalize table data"""
+        import pandas as pd
+        
         for table in tables:
             # Clean column names
             table.data.columns = [self._clean_text(str(col)) for col in table.data.columns]
@@ -178,11 +244,9 @@ class TableExtractor:
             for col in table.data.columns:
                 table.data[col] = table.data[col].apply(lambda x: self._clean_text(str(x)) if pd.notna(x) else '')
                 
-            # Remove empty rows
-            table.data = table.data[table.data.apply(lambda row: any(row != ''), axis=1)]
-            
-            # Remove empty columns
-            table.data = table.data.loc[:, table.data.apply(lambda col: any(col != ''), axis=0)]
+            # Remove empty rows and columns (every cell is a string by now)
+            non_empty = table.data != ''
+            table.data = table.data.loc[non_empty.any(axis=1), non_empty.any(axis=0)]
             
             # Update headers
             table.headers = list(table.data.columns)
@@ -191,11 +255,11 @@ class TableExtractor:
     
     def _clean_text(self, text: str) -> str:
         """Clean text content"""
-        if not text or text.lower() in ['nan', 'none']:
+        if not text or text.lower() in _EMPTY_CELL_TEXT:
             return ''
             
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_RE.sub(' ', text).strip()
         
         # Remove special characters that might break markdown
         text = text.replace('|', '\\|')
@@ -204,16 +268,15 @@ class TableExtractor:
     
     def _classify_tables(self, tables: List[ExtractedTable]) -> List[ExtractedTable]:
         """Classify tables by type based on content"""
+        import pandas as pd
+        
         for table in tables:
-            # Check for numerical data
-            numeric_cols = 0
-            for col in table.data.columns:
-                try:
-                    pd.to_numeric(table.data[col], errors='coerce').notna().sum()
-                    if pd.to_numeric(table.data[col], errors='coerce').notna().sum() > len(table.data) * 0.5:
-                        numeric_cols += 1
-                except:
-                    pass
+            # Check for numerical data: columns where most cells parse as numbers
+            try:
+                numeric_counts = table.data.apply(pd.to_numeric, errors='coerce').notna().sum()
+                numeric_cols = int((numeric_counts > len(table.data) * 0.5).sum())
+            except Exception:
+                numeric_cols = 0
                     
             numeric_ratio = numeric_cols / len(table.data.columns) if len(table.data.columns) > 0 else 0
             
@@ -241,7 +304,7 @@ class TableExtractor:
             
         return markdown_tables
     
-    def _dataframe_to_markdown(self, df: pd.DataFrame, caption: Optional[str] = None) -> str:
+    def _dataframe_to_markdown(self, df: 'pd.DataFrame', caption: Optional[str] = None) -> str:
         """Convert DataFrame to Markdown table"""
         lines = []
         
@@ -257,10 +320,10 @@ class TableExtractor:
         separator = '| ' + ' | '.join(['---' for _ in df.columns]) + ' |'
         lines.append(separator)
         
-        # Data rows
-        for _, row in df.iterrows():
-            row_str = '| ' + ' | '.join(str(val) for val in row) + ' |'
-            lines.append(row_str)
+        # Data rows, read as plain lists of cell values in one conversion
+        join = ' | '.join
+        for row in df.to_numpy(dtype=object).tolist():
+            lines.append('| ' + join(map(str, row)) + ' |')
             
         return '\n'.join(lines)
     
@@ -1,15 +1,49 @@
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-import fitz  # PyMuPDF
-import pdfplumber
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
 from dataclasses import dataclass
 import re
+import sys
+import tempfile
 from pathlib import Path
 
+import fitz  # PyMuPDF
+import numpy as np
+
+from .pdf_source import PDFSource, is_path_source, source_to_bytes, open_fitz_document, open_pdfplumber
+
 logger = logging.getLogger(__name__)
 
+# Only text blocks are used; without TEXT_PRESERVE_IMAGES MuPDF doesn't copy
+# every image's bytes into the page dict
+PAGE_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Below this many pages, starting a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
+# Resolution pages are rendered at for OCR
+OCR_DPI = 300
 
-@dataclass
+# Bulleted or numbered list item; the first alternative of TextExtractor._block_re
+_LIST_ITEM_RE = re.compile(r'^(?:[\-\*\•]|\d+\.)\s+')
+
+# Block types for font sizes above 1.5x, 1.2x and 1.1x the average
+_HEADING_TIERS = (None, "heading1", "heading2", "heading3")
+
+# Adaptive OCR threshold tuning: pages measured, threshold limits and how far
+# one page's gap between kept and target word share moves the threshold
+OCR_WARMUP_PAGES = 3
+OCR_THRESHOLD_BOUNDS = (0.3, 0.95)
+OCR_THRESHOLD_GAIN = 0.5
+
+# A document yields thousands of TextBlocks; slots drop the per-instance
+# __dict__ where supported (Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class TextBlock:
     """Represents a block of text with metadata"""
     content: str
@@ -24,88 +58,211 @@ class TextBlock:
 class TextExtractor:
     """Advanced text extraction from PDF files"""
     
-    def __init__(self, use_ocr: bool = True, ocr_threshold: float = 0.5):
+    def __init__(self, use_ocr: bool = True, ocr_threshold: float = 0.5,
+                 skip_scanned_pages: bool = False, scanned_text_threshold: int = 50,
+                 ocr_batch_size: int = 8, ocr_bucket_by_dpi: bool = True,
+                 ocr_adaptive_threshold: bool = False, ocr_target_kept: float = 0.9,
+                 page_workers: int = 1, pages: Optional[Iterable[int]] = None):
         self.use_ocr = use_ocr
+        self.page_workers = page_workers
+        # 1-based page numbers to extract; other pages are never loaded
+        self.pages = frozenset(pages) if pages else None
         self.ocr_threshold = ocr_threshold
+        self.ocr_adaptive_threshold = ocr_adaptive_threshold
+        self.ocr_target_kept = ocr_target_kept
+        self.ocr_batch_size = ocr_batch_size
+        self.ocr_bucket_by_dpi = ocr_bucket_by_dpi
+        self.skip_scanned_pages = skip_scanned_pages
+        self.scanned_text_threshold = scanned_text_threshold
+        self.scanned_pages: List[int] = []
         self.heading_patterns = {
             'chapter': re.compile(r'^(Chapter|CHAPTER|Section|SECTION)\s+\d+', re.IGNORECASE),
             'numbered': re.compile(r'^\d+\.?\d*\.?\s+\w+'),
             'lettered': re.compile(r'^[A-Z]\.\s+\w+'),
         }
+        # List items and all heading patterns as one alternation, so each
+        # block is matched once; list items are tried first since they win
+        self._block_re = re.compile('|'.join([f"(?P<list>{_LIST_ITEM_RE.pattern})"] + [
+            f"(?i:{pattern.pattern})" if pattern.flags & re.IGNORECASE else f"(?:{pattern.pattern})"
+            for pattern in self.heading_patterns.values()
+        ]))
         
-    def extract(self, pdf_path: Path) -> List[TextBlock]:
+    def extract(self, pdf_path: PDFSource) -> List[TextBlock]:
         """Extract text blocks from PDF with structure analysis"""
         text_blocks = []
+        self.scanned_pages = []
         
-        # Try PyMuPDF first for better structure preservation
-        try:
-            text_blocks.extend(self._extract_with_pymupdf(pdf_path))
-        except Exception as e:
-            logger.warning(f"PyMuPDF extraction failed: {e}, falling back to pdfplumber")
+        # The PyMuPDF document is opened once and shared by the text and OCR passes
+        with ExitStack() as stack:
+            doc = None
             
-        # Fallback or supplement with pdfplumber
-        if not text_blocks:
+            # Try PyMuPDF first for better structure preservation
             try:
-                text_blocks.extend(self._extract_with_pdfplumber(pdf_path))
+                doc = stack.enter_context(open_fitz_document(pdf_path))
+                text_blocks.extend(self._extract_with_pymupdf(pdf_path, doc))
             except Exception as e:
-                logger.error(f"PDFPlumber extraction failed: {e}")
+                logger.warning(f"PyMuPDF extraction failed: {e}, falling back to pdfplumber")
+                
+            # Fallback or supplement with pdfplumber
+            if not text_blocks and not self.scanned_pages:
+                try:
+                    text_blocks.extend(self._extract_with_pdfplumber(pdf_path))
+                except Exception as e:
+                    logger.error(f"PDFPlumber extraction failed: {e}")
+                    
+            # OCR for scanned pages if enabled
+            if self.use_ocr and self._needs_ocr(text_blocks):
+                text_blocks.extend(
+                    block for block in self._extract_with_ocr(pdf_path, doc)
+                    if self._wants_page(block.page_num)
+                )
                 
-        # OCR for scanned pages if enabled
-        if self.use_ocr and self._needs_ocr(text_blocks):
-            text_blocks.extend(self._extract_with_ocr(pdf_path))
-            
         # Analyze and classify text blocks
         text_blocks = self._analyze_text_structure(text_blocks)
         
         return text_blocks
     
-    def _extract_with_pymupdf(self, pdf_path: Path) -> List[TextBlock]:
-        """Extract text using PyMuPDF with formatting info"""
+    def extract_page(self, page, page_num: int) -> List[TextBlock]:
+        """Extract and classify text blocks from a single PyMuPDF page
+        
+        Used for streaming conversion. Headings are classified against the
+        page's own font sizes and OCR is not applied.
+        """
+        if self._is_scanned_page(page):
+            self.scanned_pages.append(page_num)
+            return []
+        return self._analyze_text_structure(self._extract_page_blocks(page, page_num))
+    
+    @staticmethod
+    def _open_document(pdf_path: PDFSource, doc=None):
+        """Reuse an already open PyMuPDF document, or open pdf_path"""
+        return nullcontext(doc) if doc is not None else open_fitz_document(pdf_path)
+    
+    def _wants_page(self, page_num: int) -> bool:
+        """Check if a page is selected for extraction"""
+        return self.pages is None or page_num in self.pages
+    
+    def _extract_with_pymupdf(self, pdf_path: PDFSource, doc=None) -> List[TextBlock]:
+        """Extract text using PyMuPDF with formatting info
+        
+        An already open document can be passed as doc to avoid reopening it.
+        """
+        with self._open_document(pdf_path, doc) as doc:
+            page_count = len(doc)
+            if self.pages is None:
+                wanted_pages = page_count
+            else:
+                wanted_pages = sum(1 for page_num in self.pages if 1 <= page_num <= page_count)
+            if self.page_workers <= 1 or wanted_pages < PARALLEL_MIN_PAGES:
+                return self._extract_page_range(doc, 1, page_count)
+                
+        return self._extract_with_pymupdf_parallel(pdf_path, page_count)
+    
+    def _extract_with_pymupdf_parallel(self, pdf_path: PDFSource, page_count: int) -> List[TextBlock]:
+        """Split the document into page ranges and extract them in worker processes"""
+        # Workers reopen the file themselves; in-memory PDFs are sent as bytes
+        source = pdf_path if is_path_source(pdf_path) else source_to_bytes(pdf_path)
+        num_workers = min(self.page_workers, page_count)
+        chunk_size = max(1, page_count // num_workers)
+        
+        blocks = []
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(_extract_pymupdf_range, source, first_page,
+                                min(first_page + chunk_size - 1, page_count), self._range_settings())
+                for first_page in range(1, page_count + 1, chunk_size)
+            ]
+            
+            # Reassemble in page order
+            for future in futures:
+                range_blocks, scanned_pages = future.result()
+                blocks.extend(range_blocks)
+                self.scanned_pages.extend(scanned_pages)
+                
+        return blocks
+    
+    def _range_settings(self) -> Dict[str, Any]:
+        """Settings a worker needs to extract a page range like this extractor"""
+        return {
+            'use_ocr': self.use_ocr,
+            'skip_scanned_pages': self.skip_scanned_pages,
+            'scanned_text_threshold': self.scanned_text_threshold,
+            'pages': self.pages,
+        }
+    
+    def _extract_page_range(self, doc, first_page: int, last_page: int) -> List[TextBlock]:
+        """Extract raw text blocks from pages first_page..last_page (1-based, inclusive)"""
         blocks = []
         
-        with fitz.open(str(pdf_path)) as doc:
-            for page_num, page in enumerate(doc, 1):
-                # Get text blocks with detailed info
-                page_dict = page.get_text("dict")
+        for page_num in range(first_page, last_page + 1):
+            if not self._wants_page(page_num):
+                continue
+                
+            page = doc[page_num - 1]
+            
+            # Skip image-only pages before decoding their images
+            if self._is_scanned_page(page):
+                self.scanned_pages.append(page_num)
+                continue
                 
-                for block in page_dict["blocks"]:
-                    if block["type"] == 0:  # Text block
-                        text_content = ""
-                        avg_font_size = 0
-                        font_counts = {}
+            blocks.extend(self._extract_page_blocks(page, page_num))
+            
+        return blocks
+    
+    def _extract_page_blocks(self, page, page_num: int) -> List[TextBlock]:
+        """Extract raw text blocks from a PyMuPDF page"""
+        blocks = []
+        
+        # Get text blocks with detailed info
+        page_dict = page.get_text("dict", flags=PAGE_DICT_FLAGS)
+        
+        for block in page_dict["blocks"]:
+            if block["type"] == 0:  # Text block
+                # One pass over the spans collects text, sizes and fonts
+                text_parts = []
+                total_size = 0
+                font_counts = {}
+                
+                for line in block.get("lines", []):
+                    for span in line.get("spans", []):
+                        text_parts.append(span["text"])
+                        total_size += span["size"]
+                        font_name = span.get("font", "")
+                        font_counts[font_name] = font_counts.get(font_name, 0) + 1
                         
-                        for line in block.get("lines", []):
-                            for span in line.get("spans", []):
-                                text_content += span["text"]
-                                avg_font_size += span["size"]
-                                font_name = span.get("font", "")
-                                font_counts[font_name] = font_counts.get(font_name, 0) + 1
-                                
-                        if text_content.strip():
-                            # Calculate average font size
-                            span_count = sum(len(line.get("spans", [])) for line in block.get("lines", []))
-                            if span_count > 0:
-                                avg_font_size /= span_count
-                                
-                            # Get most common font
-                            most_common_font = max(font_counts.items(), key=lambda x: x[1])[0] if font_counts else None
-                            
-                            blocks.append(TextBlock(
-                                content=text_content.strip(),
-                                page_num=page_num,
-                                bbox=block["bbox"],
-                                font_size=avg_font_size,
-                                font_name=most_common_font
-                            ))
-                            
+                text_content = "".join(text_parts).strip()
+                if text_content:
+                    # Calculate average font size
+                    avg_font_size = total_size / len(text_parts)
+                    
+                    # Get most common font (the first seen wins ties)
+                    most_common_font = max(font_counts, key=font_counts.get)
+                    
+                    blocks.append(TextBlock(
+                        content=text_content,
+                        page_num=page_num,
+                        bbox=block["bbox"],
+                        font_size=avg_font_size,
+                        font_name=most_common_font
+                    ))
+                    
         return blocks
     
-    def _extract_with_pdfplumber(self, pdf_path: Path) -> List[TextBlock]:
+    def _is_scanned_page(self, page) -> bool:
+        """Check if a page has too little text to be worth parsing without OCR"""
+        if not self.skip_scanned_pages or self.use_ocr:
+            return False
+        return len(page.get_text("text").strip()) < self.scanned_text_threshold
+    
+    def _extract_with_pdfplumber(self, pdf_path: PDFSource) -> List[TextBlock]:
         """Extract text using pdfplumber as fallback"""
         blocks = []
         
-        with pdfplumber.open(str(pdf_path)) as pdf:
+        with open_pdfplumber(pdf_path) as pdf:
             for page_num, page in enumerate(pdf.pages, 1):
+                if not self._wants_page(page_num):
+                    continue
+                    
                 # Extract text with layout preservation
                 text = page.extract_text(layout=True, x_tolerance=3, y_tolerance=3)
                 
@@ -123,92 +280,193 @@ class TextExtractor:
                             
         return blocks
     
-    def _extract_with_ocr(self, pdf_path: Path) -> List[TextBlock]:
+    def _extract_with_ocr(self, pdf_path: PDFSource, doc=None) -> List[TextBlock]:
         """Extract text using OCR for scanned pages"""
         blocks = []
         
         try:
             import pytesseract
-            from pdf2image import convert_from_path
+            from PIL import Image
             
-            # Convert PDF pages to images
-            images = convert_from_path(str(pdf_path), dpi=300)
+            threshold = self.ocr_threshold
+            warmup_pages = OCR_WARMUP_PAGES if self.ocr_adaptive_threshold else 0
             
-            for page_num, image in enumerate(images, 1):
-                # Perform OCR
-                ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-                
-                # Group text by blocks
-                current_block = ""
-                block_confidence = []
+            with self._open_document(pdf_path, doc) as doc:
+                page_nums = [n for n in range(1, len(doc) + 1) if self._wants_page(n)]
                 
-                for i, text in enumerate(ocr_data['text']):
-                    if text.strip():
-                        current_block += text + " "
-                        block_confidence.append(ocr_data['conf'][i])
-                    elif current_block:
-                        # End of block
-                        avg_confidence = sum(block_confidence) / len(block_confidence) if block_confidence else 0
+                # Render a batch of pages at a time to bound memory use
+                for first in range(0, len(page_nums), self.ocr_batch_size):
+                    pages = []
+                    for page_num in page_nums[first:first + self.ocr_batch_size]:
+                        # Rendered in-process by MuPDF, one pixmap alive at a time
+                        pix = doc[page_num - 1].get_pixmap(dpi=OCR_DPI, alpha=False)
+                        pages.append((page_num, Image.frombytes("RGB", (pix.width, pix.height), pix.samples)))
                         
-                        if avg_confidence > self.ocr_threshold * 100:
-                            blocks.append(TextBlock(
-                                content=current_block.strip(),
-                                page_num=page_num,
-                                bbox=(0, 0, image.width, image.height),
-                                confidence=avg_confidence / 100
-                            ))
+                    for bucket in self._bucket_pages(pages):
+                        # Tune the threshold on the first few pages, one page at a time
+                        while warmup_pages and bucket:
+                            page_num, image = bucket.pop(0)
+                            page_blocks, word_count = self._ocr_page(pytesseract, image, page_num, threshold)
+                            blocks.extend(page_blocks)
+                            
+                            if word_count:
+                                kept = sum(len(block.content.split()) for block in page_blocks)
+                                threshold = self._tune_ocr_threshold(threshold, kept / word_count)
+                            warmup_pages -= 1
+                            
+                        if bucket:
+                            blocks.extend(self._ocr_pages(pytesseract, bucket, threshold))
                         
-                        current_block = ""
-                        block_confidence = []
+            # Buckets may be processed out of page order
+            blocks.sort(key=lambda b: b.page_num)
                         
         except ImportError:
-            logger.warning("OCR libraries not available. Install pytesseract and pdf2image for OCR support.")
+            logger.warning("OCR libraries not available. Install pytesseract for OCR support.")
         except Exception as e:
             logger.error(f"OCR extraction failed: {e}")
             
         return blocks
     
+    def _bucket_pages(self, pages: List[Tuple[int, Any]]) -> List[List[Tuple[int, Any]]]:
+        """Group rendered pages by image size so same-sized pages are OCR'd together"""
+        if not self.ocr_bucket_by_dpi:
+            return [pages]
+            
+        buckets = defaultdict(list)
+        for page_num, image in pages:
+            buckets[image.size].append((page_num, image))
+        return list(buckets.values())
+    
+    def _tune_ocr_threshold(self, threshold: float, kept: float) -> float:
+        """Nudge the OCR confidence threshold towards keeping the target share of words
+        
+        Keeping more of a page's recognised words than the target raises the
+        threshold (drop doubtful text), keeping fewer lowers it.
+        """
+        low, high = OCR_THRESHOLD_BOUNDS
+        adjusted = threshold + OCR_THRESHOLD_GAIN * (kept - self.ocr_target_kept)
+        return min(high, max(low, adjusted))
+    
+    def _ocr_page(self, pytesseract, image, page_num: int,
+                  threshold: float) -> Tuple[List[TextBlock], int]:
+        """Run OCR on a single page image, returning its blocks and word count"""
+        # Perform OCR
+        ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        return self._group_ocr_words(ocr_data, range(len(ocr_data['text'])), image, page_num, threshold)
+    
+    def _ocr_pages(self, pytesseract, pages: List[Tuple[int, Any]], threshold: float) -> List[TextBlock]:
+        """Run OCR on several page images with a single tesseract invocation
+        
+        Tesseract takes a text file listing image paths as one multi-page
+        input, so its start-up is paid once per batch instead of per page.
+        """
+        if len(pages) == 1:
+            page_num, image = pages[0]
+            return self._ocr_page(pytesseract, image, page_num, threshold)[0]
+            
+        with tempfile.TemporaryDirectory(prefix='pdf2md-ocr-') as tmpdir:
+            image_paths = []
+            for index, (_, image) in enumerate(pages):
+                image_path = Path(tmpdir) / f"page_{index:04d}.png"
+                # Written once and read straight back; compression isn't worth it
+                image.save(image_path, compress_level=1)
+                image_paths.append(str(image_path))
+                
+            list_path = Path(tmpdir) / "pages.txt"
+            list_path.write_text("\n".join(image_paths) + "\n")
+            ocr_data = pytesseract.image_to_data(str(list_path), output_type=pytesseract.Output.DICT)
+            
+        # Rows are tagged with the 1-based position of their image in the list
+        page_rows = defaultdict(list)
+        for row, position in enumerate(ocr_data['page_num']):
+            page_rows[int(position)].append(row)
+            
+        blocks = []
+        for position, (page_num, image) in enumerate(pages, 1):
+            page_blocks, _ = self._group_ocr_words(ocr_data, page_rows[position], image, page_num, threshold)
+            blocks.extend(page_blocks)
+        return blocks
+    
+    def _group_ocr_words(self, ocr_data: Dict[str, list], rows: Iterable[int], image,
+                         page_num: int, threshold: float) -> Tuple[List[TextBlock], int]:
+        """Group one page's rows of tesseract output into text blocks"""
+        blocks = []
+        word_count = 0
+        
+        # Group text by blocks
+        current_block = ""
+        block_confidence = []
+        
+        for i in rows:
+            text = ocr_data['text'][i]
+            if text.strip():
+                current_block += text + " "
+                block_confidence.append(ocr_data['conf'][i])
+                word_count += 1
+            elif current_block:
+                # End of block
+                avg_confidence = sum(block_confidence) / len(block_confidence) if block_confidence else 0
+                
+                if avg_confidence > threshold * 100:
+                    blocks.append(TextBlock(
+                        content=current_block.strip(),
+                        page_num=page_num,
+                        bbox=(0, 0, image.width, image.height),
+                        confidence=avg_confidence / 100
+                    ))
+                
+                current_block = ""
+                block_confidence = []
+                
+        return blocks, word_count
+    
     def _needs_ocr(self, blocks: List[TextBlock]) -> bool:
         """Determine if OCR is needed based on extracted text"""
         if not blocks:
             return True
             
-        # Check if text content is too sparse
-        total_text = sum(len(block.content) for block in blocks)
-        avg_text_per_page = total_text / max(block.page_num for block in blocks) if blocks else 0
-        
-        return avg_text_per_page < 100  # Threshold for sparse text
+        # Check if text content is too sparse (under 100 characters per page).
+        # Blocks are in page order, so the last one is on the highest page, and
+        # counting can stop as soon as the threshold is reached
+        min_text = 100 * blocks[-1].page_num
+        total_text = 0
+        for block in blocks:
+            total_text += len(block.content)
+            if total_text >= min_text:
+                return False
+                
+        return True
     
     def _analyze_text_structure(self, blocks: List[TextBlock]) -> List[TextBlock]:
         """Analyze and classify text blocks by type"""
         if not blocks:
             return blocks
             
-        # Calculate font size statistics
-        font_sizes = [b.font_size for b in blocks if b.font_size]
+        # Calculate font size statistics from one pass over the blocks;
+        # blocks without a font size are 0 and never qualify as headings
+        sizes = np.fromiter((b.font_size or 0.0 for b in blocks), dtype=np.float64, count=len(blocks))
+        font_sizes = sizes[sizes != 0].tolist()
         if font_sizes:
             avg_font_size = sum(font_sizes) / len(font_sizes)
-            max_font_size = max(font_sizes)
             
-            for block in blocks:
+            # Heading tier of every block from one set of array comparisons
+            tiers = np.select(
+                [sizes > avg_font_size * 1.5, sizes > avg_font_size * 1.2, sizes > avg_font_size * 1.1],
+                [1, 2, 3], default=0
+            ).tolist()
+            
+            for block, tier in zip(blocks, tiers):
                 # Classify based on font size and patterns
-                if block.font_size:
-                    if block.font_size > avg_font_size * 1.5:
-                        block.block_type = "heading1"
-                    elif block.font_size > avg_font_size * 1.2:
-                        block.block_type = "heading2"
-                    elif block.font_size > avg_font_size * 1.1:
-                        block.block_type = "heading3"
-                        
-                # Check for heading patterns
-                content = block.content.strip()
-                if any(pattern.match(content) for pattern in self.heading_patterns.values()):
-                    if block.block_type == "paragraph":
+                if tier:
+                    block.block_type = _HEADING_TIERS[tier]
+                    
+                # Check for list items and heading patterns
+                match = self._block_re.match(block.content.strip())
+                if match:
+                    if match['list'] is not None:
+                        block.block_type = "list"
+                    elif block.block_type == "paragraph":
                         block.block_type = "heading2"
-                        
-                # Check for list items
-                if re.match(r'^[\-\*\•]\s+', content) or re.match(r'^\d+\.\s+', content):
-                    block.block_type = "list"
                     
         return blocks
     
@@ -217,13 +475,18 @@ class TextExtractor:
         outline = {
             "title": None,
             "sections": [],
-            "total_pages": max(b.page_num for b in blocks) if blocks else 0
+            "total_pages": 0
         }
         
         current_section = None
         current_subsection = None
+        total_pages = 0
         
+        # The highest page number is tracked in the same pass as the sections
         for block in blocks:
+            if block.page_num > total_pages:
+                total_pages = block.page_num
+                
             if block.block_type == "heading1":
                 if not outline["title"]:
                     outline["title"] = block.content
@@ -251,4 +514,14 @@ class TextExtractor:
                 elif current_section:
                     current_section["content"].append(block)
                     
-        return outline
\ No newline at end of file
+        outline["total_pages"] = total_pages
+        return outline
+
+
+def _extract_pymupdf_range(pdf_source: PDFSource, first_page: int, last_page: int,
+                           settings: Dict[str, Any]) -> Tuple[List[TextBlock], List[int]]:
+    """Extract a page range in a worker process (module-level so it can be pickled)"""
+    extractor = TextExtractor(**settings)
+    with open_fitz_document(pdf_source) as doc:
+        blocks = extractor._extract_page_range(doc, first_page, last_page)
+    return blocks, extractor.scanned_pages
@@ -1,11 +1,49 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+import os
 import re
 from dataclasses import dataclass
 
+from .extractors.content_merger import ContentMerger
+
 logger = logging.getLogger(__name__)
 
+# A line that is already numbered ("1." / "1)") or bulleted; compiled once
+# since list lines are formatted one by one
+_LIST_MARKER_RE = re.compile(r'^(?:\d+[\.\)]|[\-\*\•])')
+
+# Statistics counter for each kind of content item, by class name
+_STATISTICS_KEYS = {
+    'ExtractedImage': 'images',
+    'ExtractedTable': 'tables',
+    'CodeBlock': 'code_blocks',
+}
+
+# Buffer size for streamed Markdown files
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Threads writing section files; file I/O releases the GIL, so writes of many
+# small files overlap with each other and with generating the next section.
+# On a single CPU the thread handoff costs more than it overlaps (0: inline)
+_CPU_COUNT = os.cpu_count() or 1
+SECTION_WRITE_WORKERS = min(32, _CPU_COUNT * 4) if _CPU_COUNT > 1 else 0
+
+
+class _LineWriter:
+    """Write lines to a file as they are produced, newline-separated like str.join"""
+    
+    __slots__ = ('_write', '_separator')
+    
+    def __init__(self, file):
+        self._write = file.write
+        self._separator = ''
+        
+    def append(self, line: str):
+        self._write(self._separator + line)
+        self._separator = '\n'
+
 
 class MarkdownGenerator:
     """Generate well-formatted Markdown from extracted content"""
@@ -30,8 +68,17 @@ class MarkdownGenerator:
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate markdown for each section
-        self._generate_section_files(document_node, output_dir, image_paths, table_paths, code_paths)
-        
+        writes: Dict[Path, Future] = {}
+        executor = ThreadPoolExecutor(max_workers=SECTION_WRITE_WORKERS) if SECTION_WRITE_WORKERS else None
+        try:
+            self._generate_section_files(document_node, output_dir, image_paths, table_paths, code_paths,
+                                         executor=executor, writes=writes)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for write in writes.values():
+            write.result()  # Re-raise write errors
+            
         # Generate main index/README
         index_path = self._generate_index(document_node, output_dir, output_filename)
         
@@ -41,22 +88,53 @@ class MarkdownGenerator:
                                image_paths: Dict[Any, Path] = None,
                                table_paths: Dict[Any, Dict[str, Path]] = None,
                                code_paths: Dict[Any, Path] = None,
-                               level: int = 0):
-        """Generate Markdown files for each section"""
+                               level: int = 0,
+                               executor: Optional[ThreadPoolExecutor] = None,
+                               writes: Optional[Dict[Path, Future]] = None):
+        """Generate Markdown files for each section
+        
+        With an executor, each file is written by a worker thread and the
+        write's future is stored in writes under its path; otherwise files
+        are written before returning.
+        """
         
         # Skip root node
         if hasattr(node, 'node_type') and node.node_type == 'root':
             for child in node.children:
-                self._generate_section_files(child, output_dir, image_paths, table_paths, code_paths, level)
+                self._generate_section_files(child, output_dir, image_paths, table_paths, code_paths, level,
+                                             executor, writes)
             return
             
         # Create folder for this section
         section_dir = output_dir / node.slug if hasattr(node, 'slug') else output_dir
         section_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate markdown content
+        section_file = section_dir / "index.md"
         content = []
+        self._write_section(node, section_dir, content, image_paths, table_paths, code_paths, level,
+                            executor, writes)
         
+        if executor is None:
+            self._write_section_file(section_file, '\n'.join(content))
+        else:
+            # Sibling titles can slugify to the same folder; finish the earlier
+            # write first so the last section wins, as with sequential writes
+            previous = writes.get(section_file)
+            if previous is not None:
+                previous.result()
+            writes[section_file] = executor.submit(self._write_section_file, section_file, '\n'.join(content))
+            
+    @staticmethod
+    def _write_section_file(section_file: Path, text: str):
+        """Write a section's Markdown to its index.md"""
+        section_file.write_text(text, encoding='utf-8')
+        logger.info(f"Generated section file: {section_file}")
+    
+    def _write_section(self, node: Any, section_dir: Path, content: List[str],
+                       image_paths: Optional[Dict[Any, Path]], table_paths: Optional[Dict[Any, Dict[str, Path]]],
+                       code_paths: Optional[Dict[Any, Path]], level: int,
+                       executor: Optional[ThreadPoolExecutor] = None, writes: Optional[Dict[Path, Future]] = None):
+        """Build one section's Markdown lines, generating its child sections' files along the way"""
         # Add heading
         heading = self._format_heading(node.title, level + 1)
         content.append(heading)
@@ -151,17 +229,25 @@ class MarkdownGenerator:
                 content.append(f"- [{child.title}]({child_file})")
                 
                 # Generate child section file
-                self._generate_section_files(child, section_dir, image_paths, table_paths, code_paths, level + 1)
-                
-        # Write section file
-        section_file = section_dir / "index.md"
-        section_file.write_text('\n'.join(content), encoding='utf-8')
-        logger.info(f"Generated section file: {section_file}")
+                self._generate_section_files(child, section_dir, image_paths, table_paths, code_paths, level + 1,
+                                             executor, writes)
     
     def _generate_index(self, root_node: Any, output_dir: Path, output_filename: str = None) -> Path:
         """Generate main index/README file"""
-        content = []
-        
+        # Use PDF filename if provided, otherwise README.md
+        if output_filename:
+            index_file = output_dir / f"{output_filename}.md"
+        else:
+            index_file = output_dir / "README.md"
+            
+        with index_file.open('w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            self._write_index(root_node, _LineWriter(f))
+            
+        logger.info(f"Generated index file: {index_file}")
+        return index_file
+    
+    def _write_index(self, root_node: Any, content: _LineWriter):
+        """Write the index Markdown: root content, table of contents and statistics"""
         # Title
         content.append("# Document Index")
         content.append("")
@@ -231,18 +317,86 @@ class MarkdownGenerator:
         content.append(f"- Images: {stats['images']}")
         content.append(f"- Tables: {stats['tables']}")
         content.append(f"- Code blocks: {stats['code_blocks']}")
+    
+    def generate_page(self, page_num: int, text_blocks: List[Any], page_dir: Path,
+                      images: List[Any] = None, tables: List[Any] = None,
+                      code_blocks: List[Any] = None,
+                      image_paths: Dict[Any, Path] = None) -> str:
+        """Generate Markdown for a single page (streaming mode)"""
+        content = []
+        
+        # Text, images and tables in reading order
+        for block in ContentMerger().merge_content(text_blocks, images, tables):
+            if block.content_type == 'text':
+                text_block = block.content
+                if text_block.block_type.startswith('heading'):
+                    level_num = int(text_block.block_type[-1]) if text_block.block_type[-1].isdigit() else 3
+                    content.append(self._format_heading(text_block.content, level_num))
+                elif text_block.block_type == 'list':
+                    content.append(self._format_list(text_block.content))
+                else:
+                    content.append(self._format_paragraph(text_block.content))
+            elif block.content_type == 'image':
+                img_path = (image_paths or {}).get(id(block.content))
+                if not img_path:
+                    continue
+                content.append(self._format_image(img_path, page_dir, block.content))
+            elif block.content_type == 'table':
+                content.append(self._format_table(block.content))
+            content.append("")
+            
+        for code in code_blocks or []:
+            content.append(self._format_code_block(code, None, page_dir))
+            content.append("")
+            
+        return '\n'.join(content)
+    
+    def generate_page_index(self, page_files: List[Tuple[int, Path]], output_dir: Path,
+                            output_filename: str = None,
+                            stats: Dict[str, int] = None) -> Path:
+        """Generate the index for a streamed conversion from its (page number, file) pairs
+        
+        Only the pages written by this conversion are listed, whatever else
+        the pages directory holds.
+        """
+        stats = stats or {}
+        content = ["# Document Index", "", "## Pages", ""]
+        
+        for page_num, page_file in page_files:
+            label = f"Page {page_num}"
+            title = self._first_heading(page_file)
+            if title:
+                label = f"{label}: {title}"
+            link_path = page_file.relative_to(output_dir).as_posix()
+            content.append(f"- [{label}]({link_path})")
+            
+        content.append("")
+        content.append("")
+        content.append("## Document Statistics")
+        content.append("")
+        content.append(f"- Total pages: {stats.get('pages', 0)}")
+        content.append(f"- Images: {stats.get('images', 0)}")
+        content.append(f"- Tables: {stats.get('tables', 0)}")
+        content.append(f"- Code blocks: {stats.get('code_blocks', 0)}")
         
-        # Write index file - use PDF filename if provided, otherwise README.md
         if output_filename:
             index_file = output_dir / f"{output_filename}.md"
         else:
             index_file = output_dir / "README.md"
-        
+            
         index_file.write_text('\n'.join(content), encoding='utf-8')
         
         logger.info(f"Generated index file: {index_file}")
         return index_file
     
+    def _first_heading(self, markdown_file: Path) -> Optional[str]:
+        """Return the text of the first ATX heading in a Markdown file"""
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    return line.lstrip('#').strip()
+        return None
+    
     def _format_heading(self, text: str, level: int) -> str:
         """Format heading in Markdown"""
         if self.heading_style == 'atx':
@@ -260,12 +414,19 @@ class MarkdownGenerator:
         if not text:
             return ""
             
-        # Clean up text
-        text = re.sub(r'\s+', ' ', text).strip()
+        # ' ' is the only whitespace str.isprintable() accepts, so a short
+        # printable text without doubled or edge spaces needs no cleanup
+        if (text.isprintable() and '  ' not in text and text[0] != ' ' and text[-1] != ' '
+                and not (self.max_line_length and len(text) > self.max_line_length)):
+            return text
+            
+        # Clean up text: str.split() breaks on the same whitespace as \s+ and
+        # leaves the words ready for wrapping
+        words = text.split()
+        text = ' '.join(words)
         
         # Wrap lines if needed
         if self.max_line_length and len(text) > self.max_line_length:
-            words = text.split()
             lines = []
             current_line = []
             current_length = 0
@@ -295,12 +456,8 @@ class MarkdownGenerator:
         for line in lines:
             line = line.strip()
             if line:
-                # Detect if ordered or unordered
-                if re.match(r'^\d+[\.\)]\s*', line):
-                    # Already numbered
-                    formatted.append(line)
-                elif re.match(r'^[\-\*\•]\s*', line):
-                    # Already bulleted
+                # Already numbered or bulleted
+                if _LIST_MARKER_RE.match(line):
                     formatted.append(line)
                 else:
                     # Add bullet
@@ -385,10 +542,10 @@ class MarkdownGenerator:
             align = "|" + "|".join([" --- " for _ in headers]) + "|"
         lines.append(align)
         
-        # Data rows
-        for _, row in df.iterrows():
-            row_str = "| " + " | ".join(str(val) for val in row) + " |"
-            lines.append(row_str)
+        # Data rows, read as plain lists of cell values in one conversion
+        join = " | ".join
+        for row in df.to_numpy(dtype=object).tolist():
+            lines.append("| " + join(map(str, row)) + " |")
             
         return '\n'.join(lines)
     
@@ -426,7 +583,10 @@ class MarkdownGenerator:
             'code_blocks': 0
         }
         
-        def count_node(node: Any):
+        # Walk the tree with an explicit stack; order doesn't matter for counting
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
             if hasattr(node, 'node_type') and node.node_type != 'root':
                 stats['sections'] += 1
                 
@@ -434,16 +594,10 @@ class MarkdownGenerator:
                 stats['pages'] = max(stats['pages'], node.page_end or 0)
                 
             for item in getattr(node, 'content', []):
-                item_type = type(item).__name__
-                if item_type == 'ExtractedImage':
-                    stats['images'] += 1
-                elif item_type == 'ExtractedTable':
-                    stats['tables'] += 1
-                elif item_type == 'CodeBlock':
-                    stats['code_blocks'] += 1
+                key = _STATISTICS_KEYS.get(type(item).__name__)
+                if key:
+                    stats[key] += 1
                     
-            for child in getattr(node, 'children', []):
-                count_node(child)
-                
-        count_node(root_node)
-        return stats
\ No newline at end of file
+            stack.extend(getattr(node, 'children', []))
+            
+        return stats
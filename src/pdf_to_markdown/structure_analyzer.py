@@ -1,15 +1,62 @@
 import logging
+from bisect import bisect_right
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 import re
+import sys
 from pathlib import Path
+import numpy as np
 from slugify import slugify
 from pdf_to_markdown.extractors.content_merger import ContentMerger, ContentBlock
 
 logger = logging.getLogger(__name__)
 
+# Block that announces a table of contents
+_TOC_HEADER_RE = re.compile(r'table of contents|contents|index', re.IGNORECASE)
 
-@dataclass
+# Section types and the title words that identify them, in priority order
+_SECTION_TYPE_WORDS = (
+    ('chapter', r'chapter|chapitre'),
+    ('appendix', r'appendix|annexe'),
+    ('part', r'part|partie'),
+    ('introduction', r'introduction|preface|foreword'),
+    ('conclusion', r'conclusion|summary|epilogue'),
+    ('bibliography', r'bibliography|references|works cited'),
+    ('glossary', r'glossary|definitions'),
+    ('index', r'index'),
+)
+
+# One anchored alternative per type, each a lookahead over the whole title, so
+# a single match() tries the types in priority order; the empty named group
+# of the alternative that succeeds is match.lastgroup
+_SECTION_TYPE_RE = re.compile(
+    '|'.join(f"(?=.*?(?:{words}))(?P<{section_type}>)" for section_type, words in _SECTION_TYPE_WORDS),
+    re.DOTALL
+)
+
+# Slotted DocumentNodes (no per-instance __dict__) need Python 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+# python-slugify's default steps for plain ASCII text: commas between digits
+# are dropped, then every other run of non-alphanumerics becomes one dash
+_SLUG_NUMBER_COMMA_RE = re.compile(r'(?<=\d),(?=\d)')
+_SLUG_SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
+
+
+@lru_cache(maxsize=4096)
+def _cached_slugify(title: str) -> str:
+    """Slugify a title; headings like "Introduction" or "Summary" repeat, so results are memoized"""
+    # ASCII needs no transliteration, and without '&' there are no HTML
+    # entities to decode, so only slugify's regex steps apply
+    if title.isascii() and '&' not in title:
+        text = _SLUG_NUMBER_COMMA_RE.sub('', title.lower())
+        return _SLUG_SEPARATOR_RE.sub('-', text).strip('-')
+    return slugify(title)
+
+
+@dataclass(**_SLOTS)
 class DocumentNode:
     """Represents a node in the document hierarchy"""
     title: str
@@ -23,7 +70,7 @@ class DocumentNode:
     
     def __post_init__(self):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = _cached_slugify(self.title)
 
 
 class DocumentStructureAnalyzer:
@@ -39,6 +86,18 @@ class DocumentStructureAnalyzer:
             re.compile(r'^(Part|PART)\s+(\d+|[IVX]+)[\s:\-]*(.+)', re.IGNORECASE),
             re.compile(r'^(Appendix|APPENDIX)\s+([A-Z])[\s:\-]*(.+)', re.IGNORECASE),
         ]
+        # All TOC patterns as one alternation, tried in order like the list.
+        # Each pattern is wrapped in a group; as the last group to close it is
+        # match.lastindex, which maps to the pattern's own (first, last) groups
+        alternatives = []
+        self._toc_groups = {}
+        group = 1
+        for pattern in self.toc_patterns:
+            flags = '?i:' if pattern.flags & re.IGNORECASE else '?:'
+            alternatives.append(f"(({flags}{pattern.pattern}))")
+            self._toc_groups[group] = (group + 1, group + pattern.groups)
+            group += pattern.groups + 1
+        self._toc_re = re.compile('|'.join(alternatives))
         
     def analyze(self, text_blocks: List[Any], images: List[Any] = None, 
                 tables: List[Any] = None, code_blocks: List[Any] = None) -> DocumentNode:
@@ -57,9 +116,13 @@ class DocumentStructureAnalyzer:
         # Build hierarchy from headings
         hierarchy = self._build_hierarchy_from_headings(text_blocks)
         
+        # Flattened once: the TOC merge and content assignment change node
+        # pages and content but not the tree itself
+        all_nodes = self._flatten_hierarchy(hierarchy)
+        
         # Merge TOC and heading hierarchy
         if toc:
-            hierarchy = self._merge_with_toc(hierarchy, toc)
+            hierarchy = self._merge_with_toc(hierarchy, toc, all_nodes)
             
         # If no hierarchy was found, put merged content directly in root
         if not hierarchy:
@@ -70,13 +133,41 @@ class DocumentStructureAnalyzer:
                 root.content.append(code)
         else:
             # Assign merged content to sections
-            self._assign_merged_content_to_sections(hierarchy, merged_content, code_blocks)
+            self._assign_merged_content_to_sections(hierarchy, merged_content, code_blocks, all_nodes)
             # Optimize structure
             hierarchy = self._optimize_structure(hierarchy)
             root.children = hierarchy
         
         return root
     
+    def structure_from_outline(self, outline: List[List[Any]], page_count: Optional[int] = None) -> DocumentNode:
+        """Build the document hierarchy from an embedded PDF outline
+        
+        outline is PyMuPDF's get_toc(simple=True) output: [level, title, page]
+        entries in document order.
+        """
+        root = DocumentNode("Document", level=0, node_type="root")
+        stack = [root]
+        previous = None
+        
+        for level, title, page in outline:
+            node = DocumentNode(title.strip() or "Untitled", level=level, page_start=page if page > 0 else None)
+            
+            if previous and previous.page_start and node.page_start:
+                previous.page_end = max(previous.page_start, node.page_start - 1)
+            previous = node
+            
+            # Pop back to this entry's parent; skipped levels attach to the nearest ancestor
+            while len(stack) > 1 and stack[-1].level >= level:
+                stack.pop()
+            stack[-1].children.append(node)
+            stack.append(node)
+            
+        if previous and previous.page_start and page_count:
+            previous.page_end = page_count
+            
+        return root
+    
     def _detect_table_of_contents(self, text_blocks: List[Any]) -> Optional[List[Dict[str, Any]]]:
         """Detect and parse table of contents"""
         toc = []
@@ -84,32 +175,31 @@ class DocumentStructureAnalyzer:
         toc_page_limit = 10  # TOC usually in first few pages
         
         for block in text_blocks:
-            if hasattr(block, 'page_num') and block.page_num > toc_page_limit:
+            if getattr(block, 'page_num', 0) > toc_page_limit:
                 break
                 
             content = getattr(block, 'content', '')
             
             # Check for TOC indicators
-            if re.search(r'table of contents|contents|index', content, re.IGNORECASE):
+            if _TOC_HEADER_RE.search(content):
                 toc_started = True
                 continue
                 
             if toc_started:
                 # Parse TOC entries
-                for pattern in self.toc_patterns:
-                    match = pattern.match(content.strip())
-                    if match:
-                        groups = match.groups()
-                        if len(groups) >= 2:
-                            toc.append({
-                                'title': groups[-1].strip(),
-                                'number': groups[0] if len(groups) > 2 else None,
-                                'page': self._extract_page_number(content)
-                            })
-                            break
-                            
+                stripped = content.strip()
+                match = self._toc_re.match(stripped)
+                if match:
+                    first, last = self._toc_groups[match.lastindex]
+                    if last > first:
+                        toc.append({
+                            'title': match.group(last).strip(),
+                            'number': match.group(first) if last - first > 1 else None,
+                            'page': self._extract_page_number(content)
+                        })
+                        
                 # Stop if we hit non-TOC content
-                if content.strip() and not any(pattern.match(content.strip()) for pattern in self.toc_patterns):
+                elif stripped:
                     if len(toc) > 3:  # Valid TOC found
                         break
                     else:
@@ -121,7 +211,8 @@ class DocumentStructureAnalyzer:
     def _build_hierarchy_from_headings(self, text_blocks: List[Any]) -> List[DocumentNode]:
         """Build document hierarchy from detected headings"""
         nodes = []
-        current_level_nodes = {0: nodes}
+        # Open sections from the outermost down; each is a lower level than the next
+        stack: List[DocumentNode] = []
         
         for block in text_blocks:
             block_type = getattr(block, 'block_type', 'paragraph')
@@ -140,38 +231,40 @@ class DocumentStructureAnalyzer:
                     node_type=self._classify_section_type(content)
                 )
                 
-                # Find parent level
-                parent_level = level - 1
-                while parent_level >= 0 and parent_level not in current_level_nodes:
-                    parent_level -= 1
+                # Close sections at this level or deeper; skipped levels
+                # attach to the nearest open ancestor
+                while stack and stack[-1].level >= level:
+                    stack.pop()
                     
-                if parent_level >= 0 and current_level_nodes[parent_level]:
-                    # Add to last node at parent level
-                    parent = current_level_nodes[parent_level][-1] if isinstance(current_level_nodes[parent_level], list) else current_level_nodes[parent_level]
-                    if isinstance(parent, DocumentNode):
-                        parent.children.append(node)
-                    else:
-                        parent.append(node)
+                if stack:
+                    stack[-1].children.append(node)
                 else:
                     # Add to root level
                     nodes.append(node)
-                    
-                # Update current level tracking
-                if level not in current_level_nodes:
-                    current_level_nodes[level] = []
-                current_level_nodes[level].append(node)
+                stack.append(node)
                 
         return nodes
     
-    def _merge_with_toc(self, hierarchy: List[DocumentNode], toc: List[Dict[str, Any]]) -> List[DocumentNode]:
-        """Merge detected hierarchy with TOC information"""
+    def _merge_with_toc(self, hierarchy: List[DocumentNode], toc: List[Dict[str, Any]],
+                        all_nodes: Optional[List[DocumentNode]] = None) -> List[DocumentNode]:
+        """Merge detected hierarchy with TOC information
+        
+        all_nodes is the already flattened hierarchy, if available.
+        """
+        # No headings, so no node can take a TOC page
+        if not hierarchy:
+            return hierarchy
+        if all_nodes is None:
+            all_nodes = self._flatten_hierarchy(hierarchy)
+            
         # Match TOC entries with hierarchy nodes
+        title_index = self._build_title_index(all_nodes)
         for toc_entry in toc:
             title = toc_entry['title']
             page = toc_entry.get('page')
             
             # Find matching node in hierarchy
-            node = self._find_node_by_title(hierarchy, title)
+            node = self._find_node_by_title(title_index, title)
             if node and page:
                 node.page_start = page
                 
@@ -179,80 +272,77 @@ class DocumentStructureAnalyzer:
     
     def _assign_merged_content_to_sections(self, hierarchy: List[DocumentNode], 
                                           merged_content: List[ContentBlock],
-                                          code_blocks: List[Any] = None):
-        """Assign merged content blocks to appropriate sections"""
-        all_nodes = self._flatten_hierarchy(hierarchy)
+                                          code_blocks: List[Any] = None,
+                                          all_nodes: Optional[List[DocumentNode]] = None):
+        """Assign merged content blocks to appropriate sections
         
-        # Sort nodes by page start
-        all_nodes.sort(key=lambda n: n.page_start or 0)
+        all_nodes is the already flattened hierarchy, if available.
+        """
+        nodes, page_starts = self._sections_by_page(hierarchy, all_nodes)
+        first_section = hierarchy[0] if hierarchy else None
+        
+        # Skip heading text blocks as they define structure
+        blocks = [
+            block for block in merged_content
+            if not (block.content_type == 'text'
+                    and getattr(block.content, 'block_type', '').startswith('heading'))
+        ]
+        self._assign_items(nodes, page_starts, blocks, [block.page_num for block in blocks], first_section)
         
-        # Assign merged content blocks
-        for block in merged_content:
-            # Skip heading text blocks as they define structure
-            if block.content_type == 'text' and hasattr(block.content, 'block_type'):
-                if block.content.block_type.startswith('heading'):
-                    continue
-                    
-            page_num = block.page_num
-            node = self._find_section_for_page(all_nodes, page_num)
-            if node:
-                node.content.append(block)
-            elif hierarchy:
-                # Add to first section if no matching page found
-                hierarchy[0].content.append(block) 
-                
         # Add code blocks
         if code_blocks:
-            for code in code_blocks:
-                page_num = getattr(code, 'page_num', 0)
-                node = self._find_section_for_page(all_nodes, page_num)
-                if node:
-                    node.content.append(code)
+            self._assign_items(nodes, page_starts, code_blocks,
+                               [getattr(code, 'page_num', 0) for code in code_blocks])
     
     def _assign_content_to_sections(self, hierarchy: List[DocumentNode], text_blocks: List[Any],
                                    images: List[Any] = None, tables: List[Any] = None,
                                    code_blocks: List[Any] = None):
         """Assign content blocks to appropriate sections"""
-        all_nodes = self._flatten_hierarchy(hierarchy)
+        nodes, page_starts = self._sections_by_page(hierarchy)
         
-        # Sort nodes by page start
-        all_nodes.sort(key=lambda n: n.page_start or 0)
+        # Text blocks, except headings; images, tables and code blocks
+        text_blocks = [
+            block for block in text_blocks
+            if not getattr(block, 'block_type', 'paragraph').startswith('heading')
+        ]
+        self._assign_items(nodes, page_starts, text_blocks,
+                           [getattr(block, 'page_num', 0) for block in text_blocks],
+                           hierarchy[0] if hierarchy else None)
+        for items in (images, tables, code_blocks):
+            if items:
+                self._assign_items(nodes, page_starts, items, [getattr(item, 'page_num', 0) for item in items])
+    
+    def _sections_by_page(self, hierarchy: List[DocumentNode],
+                          all_nodes: Optional[List[DocumentNode]] = None) -> Tuple[List[DocumentNode], List[int]]:
+        """All sections sorted by start page, and their start pages (0 when unknown)"""
+        if all_nodes is None:
+            all_nodes = self._flatten_hierarchy(hierarchy)
+            
+        # Sort nodes by page start (after any TOC merge updated them)
+        nodes = sorted(all_nodes, key=lambda n: n.page_start or 0)
+        return nodes, [node.page_start or 0 for node in nodes]
+    
+    def _assign_items(self, nodes: List[DocumentNode], page_starts: List[int], items: List[Any],
+                      pages: List[int], default: Optional[DocumentNode] = None):
+        """Append each item to the section containing its page
         
-        # Assign text blocks
-        for block in text_blocks:
-            block_type = getattr(block, 'block_type', 'paragraph')
-            if not block_type.startswith('heading'):
-                page_num = getattr(block, 'page_num', 0)
-                node = self._find_section_for_page(all_nodes, page_num)
-                if node:
-                    node.content.append(block)
-                elif not all_nodes and hierarchy:
-                    # If no sections exist, add to root
-                    hierarchy[0].content.append(block) if hierarchy else None
-                    
-        # Assign images
-        if images:
-            for img in images:
-                page_num = getattr(img, 'page_num', 0)
-                node = self._find_section_for_page(all_nodes, page_num)
-                if node:
-                    node.content.append(img)
-                    
-        # Assign tables
-        if tables:
-            for table in tables:
-                page_num = getattr(table, 'page_num', 0)
-                node = self._find_section_for_page(all_nodes, page_num)
-                if node:
-                    node.content.append(table)
-                    
-        # Assign code blocks
-        if code_blocks:
-            for code in code_blocks:
-                page_num = getattr(code, 'page_num', 0)
-                node = self._find_section_for_page(all_nodes, page_num)
-                if node:
-                    node.content.append(code)
+        Items only fall back to default when there are no sections at all.
+        """
+        if not items:
+            return
+        if not nodes:
+            if default:
+                default.content.extend(items)
+            return
+            
+        # Items arrive in reading order, so consecutive ones mostly share a
+        # section; extend each section once per run of items instead of
+        # appending them one at a time
+        indices = self._section_indices(page_starts, pages)
+        bounds = (np.flatnonzero(np.diff(indices)) + 1).tolist()
+        starts = [0] + bounds
+        for index, start, end in zip(indices[starts].tolist(), starts, bounds + [len(items)]):
+            nodes[index].content.extend(items[start:end])
     
     def _optimize_structure(self, hierarchy: List[DocumentNode]) -> List[DocumentNode]:
         """Optimize document structure for better organization"""
@@ -269,106 +359,154 @@ class DocumentStructureAnalyzer:
     
     def _remove_empty_sections(self, nodes: List[DocumentNode]) -> List[DocumentNode]:
         """Remove sections with no content"""
-        filtered = []
-        for node in nodes:
-            if node.content or node.children:
-                if node.children:
-                    node.children = self._remove_empty_sections(node.children)
-                filtered.append(node)
+        # A section is kept if it had content or children before its own
+        # children were filtered
+        filtered = [node for node in nodes if node.content or node.children]
+        stack = list(filtered)
+        while stack:
+            node = stack.pop()
+            if node.children:
+                node.children = [child for child in node.children if child.content or child.children]
+                stack.extend(node.children)
         return filtered
     
     def _merge_single_child_sections(self, nodes: List[DocumentNode]) -> List[DocumentNode]:
         """Merge sections that only have one child"""
+        optimized = self._merge_single_children(nodes)
+        stack = list(optimized)
+        while stack:
+            node = stack.pop()
+            if node.children:
+                node.children = self._merge_single_children(node.children)
+                stack.extend(node.children)
+        return optimized
+    
+    def _merge_single_children(self, nodes: List[DocumentNode]) -> List[DocumentNode]:
+        """Replace each content-less section that has one child by that child (one level)"""
         optimized = []
         for node in nodes:
             if len(node.children) == 1 and not node.content:
                 # Merge with single child
                 child = node.children[0]
                 child.title = f"{node.title} - {child.title}"
-                if node.children:
-                    child.children = self._merge_single_child_sections(child.children)
                 optimized.append(child)
             else:
-                if node.children:
-                    node.children = self._merge_single_child_sections(node.children)
                 optimized.append(node)
         return optimized
     
     def _balance_hierarchy(self, nodes: List[DocumentNode], max_depth: int = 4) -> List[DocumentNode]:
         """Balance hierarchy to avoid too deep nesting"""
-        def flatten_deep_nodes(node: DocumentNode, current_depth: int = 0):
-            if current_depth >= max_depth and node.children:
-                # Flatten children into content
-                for child in node.children:
-                    node.content.extend(child.content)
-                    if child.children:
-                        node.content.extend(flatten_deep_nodes(child, current_depth + 1).content)
-                node.children = []
+        stack = [(node, 1) for node in nodes]
+        while stack:
+            node, depth = stack.pop()
+            if depth >= max_depth and node.children:
+                self._flatten_into_content(node)
             else:
-                node.children = [flatten_deep_nodes(child, current_depth + 1) for child in node.children]
-            return node
+                stack.extend((child, depth + 1) for child in node.children)
+                
+        return list(nodes)
+    
+    def _flatten_into_content(self, node: DocumentNode):
+        """Move the content of all of node's descendants into node, depth-first, and drop its children"""
+        content = list(node.content)
+        stack = list(reversed(node.children))
+        while stack:
+            current = stack.pop()
+            content.extend(current.content)
+            stack.extend(reversed(current.children))
             
-        return [flatten_deep_nodes(node, 1) for node in nodes]
+        node.content = content
+        node.children = []
     
     def _classify_section_type(self, title: str) -> str:
         """Classify section type based on title"""
-        title_lower = title.lower()
-        
-        if re.search(r'chapter|chapitre', title_lower):
-            return "chapter"
-        elif re.search(r'appendix|annexe', title_lower):
-            return "appendix"
-        elif re.search(r'part|partie', title_lower):
-            return "part"
-        elif re.search(r'introduction|preface|foreword', title_lower):
-            return "introduction"
-        elif re.search(r'conclusion|summary|epilogue', title_lower):
-            return "conclusion"
-        elif re.search(r'bibliography|references|works cited', title_lower):
-            return "bibliography"
-        elif re.search(r'glossary|definitions', title_lower):
-            return "glossary"
-        elif re.search(r'index', title_lower):
-            return "index"
-        else:
-            return "section"
+        match = _SECTION_TYPE_RE.match(title.lower())
+        return match.lastgroup if match else "section"
     
     def _extract_page_number(self, text: str) -> Optional[int]:
         """Extract page number from TOC entry"""
-        # Look for page number at the end
-        match = re.search(r'\.{2,}(\d+)$|(\d+)$', text)
-        if match:
-            return int(match.group(1) or match.group(2))
-        return None
+        # The trailing run of digits (\d, i.e. str.isdecimal), before an
+        # optional final newline as with a regex "$"; any dot leader before it
+        # doesn't change the number
+        end = len(text) - 1 if text.endswith('\n') else len(text)
+        start = end
+        while start and text[start - 1].isdecimal():
+            start -= 1
+        return int(text[start:end]) if start < end else None
     
-    def _find_node_by_title(self, nodes: List[DocumentNode], title: str) -> Optional[DocumentNode]:
-        """Find node by title (fuzzy match)"""
+    def _build_title_index(self, flat: List[DocumentNode]) -> Tuple[str, List[int], List[DocumentNode]]:
+        """Index node titles for _find_node_by_title
+        
+        flat is the flattened (depth-first) hierarchy. Returns the lowercased
+        titles joined by NUL characters, the offset each title starts at,
+        and the nodes.
+        """
+        titles = [node.title.lower() for node in flat]
+        starts = []
+        offset = 0
+        for title in titles:
+            starts.append(offset)
+            offset += len(title) + 1
+        return '\0'.join(titles), starts, flat
+    
+    def _find_node_by_title(self, title_index: Tuple[str, List[int], List[DocumentNode]],
+                            title: str) -> Optional[DocumentNode]:
+        """Find the first node, depth-first, whose title contains title (case-insensitive)"""
+        text, starts, flat = title_index
         title_lower = title.lower().strip()
-        for node in nodes:
-            if title_lower in node.title.lower():
-                return node
-            if node.children:
-                found = self._find_node_by_title(node.children, title)
-                if found:
-                    return found
-        return None
+        if '\0' in title_lower:
+            # Could match across the separator; check titles one by one
+            return next((node for node in flat if title_lower in node.title.lower()), None)
+            
+        # One substring search over all titles; the earliest hit is in the
+        # first matching title
+        position = text.find(title_lower)
+        if position < 0 or not flat:
+            return None
+        return flat[bisect_right(starts, position) - 1]
     
     def _flatten_hierarchy(self, nodes: List[DocumentNode]) -> List[DocumentNode]:
-        """Flatten hierarchy into a list"""
+        """Flatten hierarchy into a list (depth-first, parents before children)"""
         flat = []
-        for node in nodes:
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
             flat.append(node)
-            if node.children:
-                flat.extend(self._flatten_hierarchy(node.children))
+            stack.extend(reversed(node.children))
         return flat
     
-    def _find_section_for_page(self, nodes: List[DocumentNode], page_num: int) -> Optional[DocumentNode]:
-        """Find the section that contains a given page"""
-        for i, node in enumerate(nodes):
-            next_start = nodes[i + 1].page_start if i + 1 < len(nodes) else float('inf')
-            if node.page_start and node.page_start <= page_num < next_start:
-                return node
-        return nodes[-1] if nodes else None
+    def _find_section_for_page(self, nodes: List[DocumentNode], page_num: int,
+                               page_starts: Optional[List[int]] = None) -> Optional[DocumentNode]:
+        """Find the section that contains a given page
+        
+        nodes must be sorted by page start; page_starts is their
+        [n.page_start or 0 for n in nodes], precomputed for repeated lookups.
+        """
+        if not nodes:
+            return None
+        if page_starts is None:
+            page_starts = [node.page_start or 0 for node in nodes]
+            
+        # Last section starting at or before the page; sections without a
+        # start page never own one, and unowned pages go to the last section
+        index = bisect_right(page_starts, page_num) - 1
+        if index >= 0 and page_starts[index]:
+            return nodes[index]
+        return nodes[-1]
+    
+    def _find_sections_for_pages(self, nodes: List[DocumentNode], page_starts: List[int],
+                                 pages: List[int]) -> List[Optional[DocumentNode]]:
+        """Vectorized _find_section_for_page for many pages at once"""
+        if not nodes:
+            return [None] * len(pages)
+        return [nodes[index] for index in self._section_indices(page_starts, pages).tolist()]
+    
+    def _section_indices(self, page_starts: List[int], pages: List[int]) -> np.ndarray:
+        """Index of the section containing each page, for a non-empty sorted list of page starts"""
+        starts = np.asarray(page_starts, dtype=np.int64)
+        indices = np.searchsorted(starts, np.asarray(pages, dtype=np.int64), side='right') - 1
+        owned = (indices >= 0) & (starts[np.maximum(indices, 0)] != 0)
+        return np.where(owned, indices, len(page_starts) - 1)
     
     def generate_folder_structure(self, root: DocumentNode, base_path: Path) -> Dict[str, Path]:
         """Generate folder structure based on document hierarchy"""
@@ -83,18 +83,16 @@ class TestPDFToMarkdownConverter:
     
     def test_config_validation(self):
         """Test configuration validation"""
-        # Invalid config
-        config = ConversionConfig(
-            min_image_width=-1,  # Invalid
-            image_quality=150    # Invalid
-        )
-        
+        # Invalid config is rejected on construction
         with pytest.raises(ValueError) as exc_info:
-            PDFToMarkdownConverter(config)
+            ConversionConfig(
+                min_image_width=-1,  # Invalid
+                image_quality=150    # Invalid
+            )
         assert "Configuration errors" in str(exc_info.value)
     
     @patch('pdf_to_markdown.converter.TextExtractor')
-    @patch('pdf_to_markdown.converter.ImageExtractor')
+    @patch('pdf_to_markdown.extractors.image_extractor.ImageExtractor')
     def test_extract_content(self, mock_image_ext, mock_text_ext, sample_config, temp_dir):
         """Test content extraction"""
         # Setup mocks
@@ -178,23 +176,179 @@ class TestPDFToMarkdownConverter:
         mock_gen_md.assert_called_once()
         mock_metadata.assert_called_once()
     
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._extract_content')
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._analyze_structure')
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._create_folder_structure')
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._export_assets')
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._generate_markdown')
+    @patch('pdf_to_markdown.converter.PDFToMarkdownConverter._create_metadata')
+    def test_convert_stream(self, mock_metadata, mock_gen_md, mock_export,
+                            mock_folders, mock_analyze, mock_extract,
+                            sample_config, temp_dir):
+        """Test conversion from an in-memory PDF"""
+        mock_extract.return_value = {'text_blocks': [], 'images': [], 'tables': [], 'code_blocks': []}
+        mock_export.return_value = {}
+        mock_gen_md.return_value = temp_dir / "report.md"
+        
+        converter = PDFToMarkdownConverter(sample_config)
+        pdf_data = b"%PDF-1.4"
+        result = converter.convert_stream(pdf_data, temp_dir / "output", source_name="report.pdf",
+                                          source_path=temp_dir / "report.pdf")
+        
+        assert result == temp_dir / "report.md"
+        mock_extract.assert_called_once_with(pdf_data, temp_dir / "report.pdf")
+        assert mock_gen_md.call_args[0][3] == "report"
+        assert mock_metadata.call_args[0][0] == Path("report.pdf")
+    
+    def test_convert_streaming(self, temp_dir):
+        """Test page-by-page streaming conversion"""
+        pdf_path = Path(__file__).parent.parent / "examples" / "pdf-test-file.pdf"
+        config = ConversionConfig(
+            extract_images=False,
+            extract_tables=False,
+            use_ocr=False,
+            streaming=True
+        )
+        converter = PDFToMarkdownConverter(config)
+        
+        pages = list(converter.convert_streaming(pdf_path, temp_dir))
+        
+        assert [page.page_num for page in pages] == [1]
+        assert pages[0].path == temp_dir / "pages" / "0001.md"
+        assert pages[0].path.read_text(encoding='utf-8') == pages[0].markdown
+        assert "pages/0001.md" in (temp_dir / "pdf-test-file.md").read_text(encoding='utf-8')
+        assert (temp_dir / "metadata.json").exists()
+        
+        # convert() drains the stream when streaming is enabled
+        progress = []
+        result = converter.convert(pdf_path, temp_dir / "again",
+                                   progress_callback=lambda done, total: progress.append((done, total)))
+        assert result == temp_dir / "again" / "pdf-test-file.md"
+        assert result.exists()
+        assert progress == [(1, 1)]
+    
+    def test_convert_streaming_index_ignores_other_page_files(self, temp_dir):
+        """Test the streamed index lists only this run's pages, not leftovers in pages/"""
+        pdf_path = Path(__file__).parent.parent / "examples" / "pdf-test-file.pdf"
+        pages_dir = temp_dir / "pages"
+        pages_dir.mkdir()
+        (pages_dir / "0009.md").write_text("# Stale page", encoding='utf-8')
+        (pages_dir / "notes.md").write_text("# Notes", encoding='utf-8')
+        config = ConversionConfig(extract_images=False, extract_tables=False, use_ocr=False)
+        
+        list(PDFToMarkdownConverter(config).convert_streaming(pdf_path, temp_dir))
+        
+        index = (temp_dir / "pdf-test-file.md").read_text(encoding='utf-8')
+        assert "pages/0001.md" in index
+        assert "0009" not in index
+        assert "notes" not in index
+    
+    def test_convert_streaming_releases_lock_between_pages(self, temp_dir):
+        """Test a consumer can convert another PDF while a stream is paused at a page"""
+        import threading
+        
+        pdf_path = Path(__file__).parent.parent / "examples" / "pdf-test-file.pdf"
+        config = ConversionConfig(extract_images=False, extract_tables=False, use_ocr=False)
+        converter = PDFToMarkdownConverter(config)
+        nested = []
+        
+        def consume():
+            for page in PDFToMarkdownConverter(config).convert_streaming(pdf_path, temp_dir / "outer"):
+                nested.append(converter.convert(pdf_path, temp_dir / f"inner{page.page_num}"))
+        
+        worker = threading.Thread(target=consume, daemon=True)
+        worker.start()
+        worker.join(timeout=60)
+        
+        assert not worker.is_alive()
+        assert [path.exists() for path in nested] == [True]
+    
+    def test_structure_from_outline(self, sample_config):
+        """Test building the hierarchy from an embedded PDF outline"""
+        converter = PDFToMarkdownConverter(sample_config)
+        outline = [[1, "Intro", 1], [2, "Scope", 2], [1, "Usage", 4], [3, "Deep", 5]]
+        
+        root = converter.structure_analyzer.structure_from_outline(outline, page_count=9)
+        
+        assert [child.title for child in root.children] == ["Intro", "Usage"]
+        assert [child.title for child in root.children[0].children] == ["Scope"]
+        assert root.children[1].children[0].title == "Deep"
+        assert root.children[0].page_end == 1
+        assert root.children[1].children[0].page_end == 9
+    
+    def test_hierarchy_from_headings(self, sample_config):
+        """Test nesting detected headings by level"""
+        converter = PDFToMarkdownConverter(sample_config)
+        blocks = [
+            TextBlock(content=title, page_num=page, bbox=(0, 0, 100, 20), block_type=block_type)
+            for title, page, block_type in [
+                ("Intro", 1, "heading1"), ("Scope", 1, "heading2"),
+                ("Usage", 2, "heading1"), ("Deep", 3, "heading3"), ("Next", 4, "heading2"),
+            ]
+        ]
+        
+        nodes = converter.structure_analyzer._build_hierarchy_from_headings(blocks)
+        
+        assert [node.title for node in nodes] == ["Intro", "Usage"]
+        assert [child.title for child in nodes[0].children] == ["Scope"]
+        assert [child.title for child in nodes[1].children] == ["Deep", "Next"]
+    
     def test_batch_convert(self, sample_config, temp_dir):
-        """Test batch conversion"""
-        # Create test PDFs
-        pdf1 = temp_dir / "test1.pdf"
-        pdf2 = temp_dir / "test2.pdf"
-        pdf1.touch()
-        pdf2.touch()
-        
-        # Mock convert method
+        """Test batch conversion in worker processes (the default backend)"""
+        examples = Path(__file__).parent.parent / "examples"
+        pdf_files = [examples / "pdf-test-file.pdf", examples / "pdf-example-dummy.pdf",
+                     temp_dir / "missing.pdf"]
+        sample_config.num_workers = 2
+        converter = PDFToMarkdownConverter(sample_config)
+        
+        with patch.object(converter, '_batch_map', wraps=converter._batch_map) as batch_map:
+            results = converter.batch_convert(pdf_files, temp_dir / "output")
+        
+        assert batch_map.call_count == 1
+        assert [pdf_path for pdf_path, _, _ in results] == pdf_files
+        for pdf_path, result, error in results[:2]:
+            assert error is None
+            assert result == temp_dir / "output" / pdf_path.stem / f"{pdf_path.stem}.md"
+            assert result.exists()
+        assert results[2][1] is None
+        assert "not found" in results[2][2]
+    
+    def test_batch_convert_lazy_files_with_progress(self, sample_config, temp_dir):
+        """Test batch conversion of a lazy file iterator reporting progress to a callback"""
+        examples = Path(__file__).parent.parent / "examples"
+        pdf_files = [examples / "pdf-test-file.pdf", examples / "pdf-example-dummy.pdf"]
+        sample_config.parallel_backend = 'thread'
+        progress = []
+        
+        results = PDFToMarkdownConverter(sample_config).batch_convert(
+            iter(pdf_files), temp_dir / "output",
+            progress_callback=lambda done, total: progress.append((done, total))
+        )
+        
+        assert sorted(pdf_path for pdf_path, _, _ in results) == sorted(pdf_files)
+        assert all(error is None for _, _, error in results)
+        assert progress == [(1, None), (2, None)]
+    
+    def test_batch_convert_threads(self, sample_config, temp_dir):
+        """Test real PDFs converted concurrently by the thread backend"""
+        examples = Path(__file__).parent.parent / "examples"
+        pdf_files = [examples / "pdf-test-file.pdf", examples / "pdf-example-dummy.pdf"]
+        sample_config.parallel_backend = 'thread'
+        sample_config.num_workers = 2
         converter = PDFToMarkdownConverter(sample_config)
-        converter.convert = Mock(return_value=temp_dir / "index.md")
         
-        # Run batch conversion
-        results = converter.batch_convert([pdf1, pdf2], temp_dir / "output")
+        results = converter.batch_convert(pdf_files, temp_dir / "threads")
+        
+        assert sorted((pdf_path, error) for pdf_path, _, error in results) == [
+            (pdf_path, None) for pdf_path in sorted(pdf_files)
+        ]
         
-        assert len(results) == 2
-        assert converter.convert.call_count == 2
+        # Output matches converting the same files one after another
+        sample_config.parallel_processing = False
+        PDFToMarkdownConverter(sample_config).batch_convert(pdf_files, temp_dir / "sequential")
+        for pdf_path, result, _ in results:
+            expected = temp_dir / "sequential" / pdf_path.stem / result.name
+            assert result.read_text(encoding='utf-8') == expected.read_text(encoding='utf-8')
 
 
 class TestConversionConfig:
@@ -209,6 +363,16 @@ class TestConversionConfig:
         assert config.use_ocr is True
         assert config.min_image_width == 50
         assert config.min_image_height == 50
+        assert 1 <= config.num_workers <= 8
+    
+    def test_config_for_analysis(self):
+        """Test analysis preset disables heavy extraction"""
+        config = ConversionConfig.for_analysis()
+        assert config.extract_images is False
+        assert config.extract_tables is False
+        assert config.use_ocr is False
+        assert config.detect_scanned_pages_only is True
+        assert config.validate() == []
     
     def test_config_validation_valid(self):
         """Test validation with valid config"""
@@ -222,11 +386,17 @@ class TestConversionConfig:
     
     def test_config_validation_invalid(self):
         """Test validation with invalid config"""
-        config = ConversionConfig(
+        class LenientConfig(ConversionConfig):
+            _validate_on_init = False
+        
+        config = LenientConfig(
             min_image_width=0,  # Invalid
             image_quality=150,  # Invalid
             ocr_confidence_threshold=1.5,  # Invalid
-            heading_style='invalid'  # Invalid
+            heading_style='invalid',  # Invalid
+            parallel_backend='gpu',  # Invalid
+            duplicate_image_hash='crc32',  # Invalid
+            min_code_confidence=2.0  # Invalid
         )
         errors = config.validate()
         assert len(errors) > 0
@@ -234,6 +404,9 @@ class TestConversionConfig:
         assert any('image_quality' in e for e in errors)
         assert any('ocr_confidence_threshold' in e for e in errors)
         assert any('heading_style' in e for e in errors)
+        assert any('parallel_backend' in e for e in errors)
+        assert any('duplicate_image_hash' in e for e in errors)
+        assert any('min_code_confidence' in e for e in errors)
     
     def test_config_to_from_yaml(self, tmp_path):
         """Test YAML serialization"""
@@ -250,7 +423,17 @@ class TestConversionConfig:
         assert loaded_config.extract_images is False
         assert loaded_config.min_table_rows == 3
         assert loaded_config.verbose is True
-    
+
+    def test_config_yaml_dumper_is_private(self):
+        """Test the path representer doesn't leak into PyYAML's own dumpers"""
+        import yaml
+        from pathlib import PurePosixPath
+        from pdf_to_markdown.config import _ConfigDumper, _YamlDumper
+
+        assert yaml.dump(PurePosixPath('a/b'), Dumper=_ConfigDumper).startswith('a/b')
+        with pytest.raises(yaml.representer.RepresenterError):
+            yaml.dump(PurePosixPath('a/b'), Dumper=_YamlDumper)
+
     def test_config_to_from_json(self, tmp_path):
         """Test JSON serialization"""
         config = ConversionConfig(
@@ -267,6 +450,222 @@ class TestConversionConfig:
         assert loaded_config.max_hierarchy_depth == 5
         assert loaded_config.debug is True
 
+    def test_config_from_file_instances_independent(self, tmp_path):
+        """Test cached config loads do not share mutable fields"""
+        yaml_path = tmp_path / "config.yaml"
+        ConversionConfig(export_table_formats=['csv']).to_yaml(yaml_path)
+
+        first = ConversionConfig.from_yaml(yaml_path)
+        first.export_table_formats.append('json')
+        second = ConversionConfig.from_yaml(yaml_path)
+
+        assert second.export_table_formats == ['csv']
+
+
+class TestTextExtractor:
+    """Test suite for TextExtractor"""
+    
+    def test_adaptive_ocr_threshold_tracks_kept_words(self):
+        """Test the OCR threshold moves towards keeping the target share of words"""
+        extractor = TextExtractor(ocr_adaptive_threshold=True, ocr_target_kept=0.9)
+        
+        assert extractor._tune_ocr_threshold(0.5, 0.9) == 0.5
+        assert extractor._tune_ocr_threshold(0.5, 1.0) > 0.5
+        assert extractor._tune_ocr_threshold(0.5, 0.4) < 0.5
+        assert extractor._tune_ocr_threshold(0.94, 1.0) == 0.95
+
+
+class TestMarkdownGenerator:
+    """Test suite for MarkdownGenerator"""
+    
+    def test_colliding_section_slugs_written_in_order(self, tmp_path):
+        """Test siblings sharing a slug leave the last one's file intact with concurrent writes"""
+        from pdf_to_markdown.markdown_generator import MarkdownGenerator
+        from pdf_to_markdown.structure_analyzer import DocumentNode
+        
+        def document():
+            long_text = [TextBlock(content=f"Paragraph {i}", page_num=1, bbox=(0, 0, 1, 1)) for i in range(200)]
+            return DocumentNode(title="Root", level=0, node_type="root", children=[
+                DocumentNode(title="Intro", level=1, content=long_text),
+                DocumentNode(title="Intro!", level=1,
+                             content=[TextBlock(content="Short", page_num=2, bbox=(0, 0, 1, 1))]),
+            ])
+        
+        with patch('pdf_to_markdown.markdown_generator.SECTION_WRITE_WORKERS', 0):
+            MarkdownGenerator().generate_document(document(), tmp_path / "sequential")
+        with patch('pdf_to_markdown.markdown_generator.SECTION_WRITE_WORKERS', 4):
+            MarkdownGenerator().generate_document(document(), tmp_path / "threads")
+        
+        expected = (tmp_path / "sequential" / "intro" / "index.md").read_text(encoding='utf-8')
+        assert "Short" in expected
+        assert (tmp_path / "threads" / "intro" / "index.md").read_text(encoding='utf-8') == expected
+
+
+class TestTableExtractor:
+    """Test suite for TableExtractor"""
+    
+    def test_camelot_reads_source_path_of_in_memory_pdf(self, tmp_path):
+        """Test camelot gets the file an in-memory PDF was read from"""
+        pdf_path = tmp_path / "report.pdf"
+        extractor = TableExtractor(method="camelot")
+        
+        with patch.object(extractor, '_extract_with_camelot', return_value=[]) as camelot:
+            extractor.extract(b"%PDF-1.4", source_path=pdf_path)
+            extractor.extract(b"%PDF-1.4")
+        
+        assert [call.args[0] for call in camelot.call_args_list] == [pdf_path, b"%PDF-1.4"]
+    
+    def test_camelot_runs_only_when_tabula_finds_nothing(self):
+        """Test the auto-mode fallback doesn't start camelot once tabula found tables"""
+        extractor = TableExtractor()
+        table = Mock()
+        
+        with patch.object(extractor, '_extract_with_tabula', side_effect=[[table], []]), \
+                patch.object(extractor, '_extract_with_camelot', return_value=[]) as camelot:
+            assert extractor._extract_with_fallbacks("a.pdf", "a.pdf") == [table]
+            assert camelot.call_count == 0
+            assert extractor._extract_with_fallbacks("a.pdf", "a.pdf") == []
+            assert camelot.call_count == 1
+
+
+class TestContentMerger:
+    """Test suite for ContentMerger"""
+    
+    def test_small_image_moves_before_overlapping_text(self):
+        """Test a wrapped image is placed before text it overlaps, even if not adjacent"""
+        from pdf_to_markdown.extractors.content_merger import ContentMerger
+        
+        column = TextBlock(content="Long column", page_num=1, bbox=(0, 50, 100, 90))
+        caption = TextBlock(content="Side note", page_num=1, bbox=(110, 70, 200, 80))
+        image = ExtractedImage(image_data=b"", page_num=1, bbox=(110, 75, 200, 95),
+                               width=90, height=20, format="png", hash="0")
+        
+        merged = ContentMerger().merge_content([column, caption], [image])
+        
+        assert [block.content for block in merged] == [image, column, caption]
+
+
+
+class TestImageExtractor:
+    """Test suite for ImageExtractor"""
+    
+    def test_page_workers_keep_duplicates_when_detection_off(self, tmp_path):
+        """Test worker processes honour detect_duplicates=False like in-process extraction"""
+        import io
+        import fitz
+        import numpy as np
+        from PIL import Image
+        
+        buffer = io.BytesIO()
+        pixels = np.random.default_rng(0).integers(0, 255, (80, 80, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(buffer, format='PNG')
+        pdf_path = tmp_path / "repeated.pdf"
+        with fitz.open() as doc:
+            for _ in range(4):
+                doc.new_page().insert_image(fitz.Rect(50, 50, 250, 250), stream=buffer.getvalue())
+            doc.save(pdf_path)
+        
+        counts = [
+            len(ImageExtractor(extract_inline=False, detect_duplicates=False,
+                               page_workers=workers).extract(pdf_path))
+            for workers in (1, 2)
+        ]
+        
+        assert counts == [4, 4]
+    
+    def test_missing_opencv_keeps_placement_based_inline_images(self):
+        """Test a failed OpenCV import only turns off edge detection"""
+        page = Mock()
+        extractor = ImageExtractor()
+        
+        with patch.dict('sys.modules', {'cv2': None}):
+            assert extractor._detect_inline_images(page, 1) == []
+        
+        assert extractor._cv2_missing
+        assert extractor.extract_inline
+        
+        with patch.object(extractor, '_render_regions', return_value=["region"]) as render:
+            images = extractor._extract_inline_images(page, 2, image_info=[{'bbox': (0, 0, 90, 90), 'xref': 0}])
+        
+        assert images == ["region"]
+        assert render.call_count == 1
+        assert extractor._detect_inline_images(page, 3) == []
+        assert page.get_pixmap.call_count == 0
+    
+    def test_near_duplicate_images_removed(self):
+        """Test a re-encoded copy of an image is dropped as a duplicate"""
+        import io
+        import numpy as np
+        from PIL import Image
+        
+        def encode(pixels, fmt, **kwargs):
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).convert('RGB').save(buffer, format=fmt, **kwargs)
+            return buffer.getvalue()
+        
+        gradient = (np.add.outer(np.arange(120), np.arange(160)) % 255).astype(np.uint8)
+        noise = np.random.default_rng(0).integers(0, 255, (120, 160), dtype=np.uint8)
+        sources = [encode(gradient, 'PNG'), encode(gradient, 'JPEG', quality=40), encode(noise, 'PNG')]
+        images = [
+            ExtractedImage(image_data=data, page_num=1, bbox=(0, 0, 160, 120),
+                           width=160, height=120, format="png", hash=str(i))
+            for i, data in enumerate(sources)
+        ]
+        
+        unique = ImageExtractor(near_duplicate_distance=6)._remove_duplicates(images)
+        
+        assert [img.hash for img in unique] == ["0", "2"]
+        assert ImageExtractor(near_duplicate_distance=0)._remove_duplicates(images) == images
+    
+    def test_near_identical_images_kept_by_default(self):
+        """Test similar but different images survive when near-duplicate detection is off"""
+        import io
+        import numpy as np
+        from PIL import Image
+        
+        def encode(pixels):
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format='PNG')
+            return buffer.getvalue()
+        
+        gradient = (np.add.outer(np.arange(120), np.arange(160)) % 255).astype(np.uint8)
+        marked = gradient.copy()
+        marked[10:14, 10:14] = 0
+        images = [
+            ExtractedImage(image_data=encode(pixels), page_num=1, bbox=(0, 0, 160, 120),
+                           width=160, height=120, format="png", hash=str(i))
+            for i, pixels in enumerate([gradient, marked])
+        ]
+        
+        assert ImageExtractor()._remove_duplicates(images) == images
+        assert [img.phash for img in images] == [None, None]
+        assert len(ImageExtractor(near_duplicate_distance=6)._remove_duplicates(images)) == 1
+
+
+
+class TestCodeBlockExtractor:
+    """Test suite for CodeBlockExtractor"""
+    
+    def test_low_punctuation_code_detected(self):
+        """Test code with little bracket punctuation is still detected by default"""
+        blocks = [
+            "services:\n  web:\n    image: nginx:latest\n    ports:\n      - \"80:80\"\n",
+            "set -e\ncd /opt/app\npip install -r requirements.txt\nexport PATH=$HOME/bin:$PATH\n",
+            "SELECT name, email\nFROM users\nWHERE active = 1\nORDER BY name;\n",
+        ]
+        extractor = CodeBlockExtractor()
+        
+        assert [extractor._is_code_block(text) for text in blocks] == [True, True, True]
+    
+    def test_short_code_language_guess(self):
+        """Test short snippets are guessed with Pygments unless min_guess_chars is set"""
+        from pdf_to_markdown.extractors.code_extractor import _guess_language
+        
+        snippet = "SELECT * FROM t;"
+        
+        assert CodeBlockExtractor()._detect_language(snippet) == _guess_language(snippet)
+        assert CodeBlockExtractor(min_guess_chars=40)._detect_language(snippet) is None
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file